@@ -0,0 +1,109 @@
+"""Compare the compiled BM25 index against langchain's BM25Retriever.
+
+Checks that both return the same top-k on a fixed query set, then reports
+startup time, query latency and resident memory for each, every retriever
+measured in its own process. Run from the repository root once the app has
+written its chunk store:
+
+    python -m benchmarks.bench_bm25
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from benchmarks.common import current_rss_mb, percentile
+
+QUERIES = [
+    "How do I apply for admission?",
+    "How to get a Student ID?",
+    "How can I enroll?",
+    "How do I request for documents for scholarship?",
+    "What are the requirements for transcript of records?",
+    "Where can I pay my tuition fees?",
+    "library card application",
+    "How long does it take to process a certificate of enrollment?",
+    "Who signs the clearance form?",
+    "office hours of the registrar",
+]
+
+def load_chunk_store(store_path):
+    """Return the chunks and key stored in a chunk store file."""
+    from langchain_core.documents import Document
+    with open(store_path, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+    chunks = [Document(page_content=c["page_content"], metadata=c["metadata"]) for c in payload["chunks"]]
+    return chunks, payload["key"]
+
+def run_mode(mode, store_path, index_dir, k, repeats):
+    """Measure one retriever implementation and return its results."""
+    chunks, key = load_chunk_store(store_path)
+    position = {id(c): i for i, c in enumerate(chunks)}
+    rss_before = current_rss_mb()
+
+    start = time.perf_counter()
+    if mode == "rank_bm25":
+        from langchain.retrievers import BM25Retriever
+        retriever = BM25Retriever.from_documents(chunks)
+        retriever.k = k
+    else:
+        from src.bm25_index import BM25Index, BM25IndexRetriever
+        index = BM25Index.load(index_dir, key) or BM25Index.build(chunks, index_dir, key)
+        retriever = BM25IndexRetriever(index=index, docs=chunks, k=k)
+    startup_ms = (time.perf_counter() - start) * 1000
+
+    top_k = {}
+    latencies = []
+    for _ in range(repeats):
+        for query in QUERIES:
+            start = time.perf_counter()
+            docs = retriever.invoke(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+            top_k[query] = [position[id(d)] for d in docs]
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "startup_ms": round(startup_ms, 3),
+        "p50_ms": round(statistics.median(latencies), 4),
+        "p95_ms": round(percentile(latencies, 95), 4),
+        "rss_delta_mb": round(current_rss_mb() - rss_before, 2),
+        "top_k": top_k,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunk-store", default="chroma_db_cache/chunks.json")
+    parser.add_argument("--index-dir", default="chroma_db_cache/bm25")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--mode", choices=["rank_bm25", "index"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.chunk_store, args.index_dir, args.k, args.repeats)))
+        return
+
+    results = {}
+    for mode in ("rank_bm25", "index"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_bm25", "--mode", mode,
+             "--chunk-store", args.chunk_store, "--index-dir", args.index_dir,
+             "--k", str(args.k), "--repeats", str(args.repeats)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    mismatches = [q for q in QUERIES if results["rank_bm25"]["top_k"][q] != results["index"]["top_k"][q]]
+    for mode, result in results.items():
+        print(f"{mode:>10}: startup {result['startup_ms']:.1f} ms, "
+              f"p50 {result['p50_ms']:.3f} ms, p95 {result['p95_ms']:.3f} ms, "
+              f"RSS +{result['rss_delta_mb']:.1f} MB")
+    if mismatches:
+        print(f"Top-{args.k} mismatch on {len(mismatches)} queries: {mismatches}")
+        sys.exit(1)
+    print(f"Top-{args.k} identical on all {len(QUERIES)} queries")
+
+if __name__ == "__main__":
+    main()
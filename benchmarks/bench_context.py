@@ -0,0 +1,63 @@
+"""Effect of token-budgeted context packing on prompt size and end-to-end latency.
+
+Builds the real hybrid retriever (compiled BM25 plus a stand-in dense side)
+over the chunk store, and a stub LLM whose latency grows with prompt length
+(--prompt-token-ms models prefill cost). It then compares the chain that
+sends the raw document list with chains that pack the context to each
+budget. Run from the repository root:
+
+    python -m benchmarks.bench_context --budgets 512 1024 1536
+"""
+import argparse
+import statistics
+import time
+from benchmarks.bench_bm25 import QUERIES, load_chunk_store
+from benchmarks.bench_hybrid import SimulatedDenseRetriever
+from benchmarks.common import percentile
+from benchmarks.stubs import StubLLM
+from src.bm25_index import BM25Index, BM25IndexRetriever
+from src.llm import assemble_chain, count_tokens, setup_prompt_template
+from src.retriever import HybridRetriever
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunk-store", default="chroma_db_cache/chunks.json")
+    parser.add_argument("--index-dir", default="chroma_db_cache/bm25")
+    parser.add_argument("--budgets", type=int, nargs="+", default=[512, 1024, 1536])
+    parser.add_argument("--first-token-ms", type=float, default=200.0)
+    parser.add_argument("--prompt-token-ms", type=float, default=0.5)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    chunks, key = load_chunk_store(args.chunk_store)
+    index = BM25Index.load(args.index_dir, key) or BM25Index.build(chunks, args.index_dir, key)
+    retriever = HybridRetriever(
+        retrievers=[SimulatedDenseRetriever(docs=chunks, latency_ms=0),
+                    BM25IndexRetriever(index=index, docs=chunks, k=5)],
+        weights=[0.5, 0.5],
+    )
+    prompt, output_parser = setup_prompt_template()
+    llm = StubLLM(first_token_ms=args.first_token_ms, token_ms=0, prompt_token_ms=args.prompt_token_ms)
+
+    print(f"{'context':>8} {'prompt_tokens':>13} {'saved':>6} {'p50_ms':>8} {'p95_ms':>8}")
+    baseline_tokens = None
+    for budget in [None] + sorted(args.budgets):
+        chain = assemble_chain(retriever, prompt, llm, output_parser, max_context_tokens=budget)
+        prompt_chain = chain.first | prompt  # the {"context", "query"} map followed by the prompt
+        tokens = [count_tokens(prompt_chain.invoke(q).to_string()) for q in QUERIES]
+        latencies = []
+        for _ in range(args.repeats):
+            for query in QUERIES:
+                start = time.perf_counter()
+                chain.invoke(query)
+                latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        mean_tokens = statistics.mean(tokens)
+        if baseline_tokens is None:
+            baseline_tokens = mean_tokens
+        label = "raw" if budget is None else str(budget)
+        print(f"{label:>8} {mean_tokens:>13.0f} {1 - mean_tokens / baseline_tokens:>6.0%} "
+              f"{percentile(latencies, 50):>8.1f} {percentile(latencies, 95):>8.1f}")
+
+if __name__ == "__main__":
+    main()
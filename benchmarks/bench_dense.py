@@ -0,0 +1,121 @@
+"""Dense retrieval latency and recall@k of the NumPy index versus Chroma.
+
+Exports the persisted Chroma collection into a DenseIndex (in a temporary
+directory) and compares NumpyDenseRetriever with vector_store.as_retriever
+on the same query vectors. Queries are embedded by a zero-latency stub, so
+only search cost is measured and no token or network is needed; recall is
+additionally checked on --self-queries stored vectors, which must retrieve
+themselves first. recall@k is measured against exact search, so Chroma's
+HNSW is the side that may fall short. The check fails (exit status 1) if
+either recall is below --min-recall or a stored vector does not retrieve
+itself first. Run from the repository root:
+
+    python -m benchmarks.bench_dense --k 5 --repeats 20 --dtype float16
+"""
+import argparse
+import shutil
+import tempfile
+import time
+import numpy as np
+from benchmarks.bench_bm25 import QUERIES
+from benchmarks.common import current_rss_mb, percentile
+from benchmarks.stubs import StubEmbeddings
+from src.dense_index import DenseIndex, NumpyDenseRetriever
+from src.retriever import open_vector_store
+
+def open_collection(persist_directory):
+    """Open the persisted collection with zero-latency stub embeddings of matching dimension."""
+    probe = open_vector_store(StubEmbeddings(call_latency_ms=0, text_latency_ms=0), persist_directory)
+    sample = probe._collection.get(limit=1, include=["embeddings"])["embeddings"]
+    if sample is None or len(sample) == 0:
+        raise SystemExit(f"No vectors in {persist_directory}; run the app or src.ingest first")
+    embeddings = StubEmbeddings(dimension=len(sample[0]), call_latency_ms=0, text_latency_ms=0)
+    return embeddings, open_vector_store(embeddings, persist_directory)
+
+def measure(fn, queries, repeats):
+    """Return sorted per-query latencies in ms and the last result for each query."""
+    latencies = []
+    results = {}
+    for _ in range(repeats):
+        for query in queries:
+            start = time.perf_counter()
+            results[query] = fn(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return latencies, results
+
+def recall(expected, actual):
+    """Mean fraction of each expected top-k that also appears in actual."""
+    scores = [len(set(e) & set(a)) / len(e) for e, a in zip(expected, actual) if e]
+    return sum(scores) / len(scores) if scores else 1.0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--persist-directory", default="chroma_db")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    parser.add_argument("--self-queries", type=int, default=200)
+    parser.add_argument("--min-recall", type=float, default=0.95)
+    args = parser.parse_args()
+
+    embeddings, vector_store = open_collection(args.persist_directory)
+
+    index_dir = tempfile.mkdtemp(prefix="psu_dense_")
+    try:
+        rss_before = current_rss_mb()
+        start = time.perf_counter()
+        index = DenseIndex.export(vector_store, index_dir, "bench", dtype=args.dtype)
+        export_ms = (time.perf_counter() - start) * 1000
+        rss_after = current_rss_mb()
+    finally:
+        shutil.rmtree(index_dir, ignore_errors=True)
+    print(f"exported {len(index)} x {index.vectors.shape[1]} {args.dtype} vectors in {export_ms:.0f} ms "
+          f"(matrix {index.vectors.nbytes / 2**20:.1f} MB, RSS +{rss_after - rss_before:.1f} MB)")
+
+    chroma = vector_store.as_retriever(search_kwargs={"k": args.k})
+    numpy_retriever = NumpyDenseRetriever(embeddings=embeddings, index=index, k=args.k)
+    print(f"{'retriever':>10} {'p50_ms':>8} {'p95_ms':>8}")
+    results = {}
+    for name, retriever in (("chroma", chroma), ("numpy", numpy_retriever)):
+        retriever.invoke(QUERIES[0])  # warm up
+        latencies, results[name] = measure(retriever.invoke, QUERIES, args.repeats)
+        print(f"{name:>10} {percentile(latencies, 50):>8.3f} {percentile(latencies, 95):>8.3f}")
+
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        numpy_retriever.batch_search(QUERIES)
+    batch_ms = (time.perf_counter() - start) * 1000 / (args.repeats * len(QUERIES))
+    print(f"{'numpy x' + str(len(QUERIES)):>10} {batch_ms:>8.3f} per query (batched)")
+
+    def contents(docs):
+        return [doc.page_content for doc in docs]
+
+    query_recall = recall([contents(results["numpy"][q]) for q in QUERIES],
+                          [contents(results["chroma"][q]) for q in QUERIES])
+    print(f"chroma recall@{args.k} vs exact on {len(QUERIES)} queries: {query_recall:.3f}")
+
+    rng = np.random.default_rng(0)
+    rows = rng.choice(len(index), size=min(args.self_queries, len(index)), replace=False)
+    vectors = np.asarray(index.vectors[rows], dtype=np.float32)
+    exact, _ = index.search(vectors, args.k)
+    self_hits = float(np.mean(exact[:, 0] == rows))
+    chroma_docs = [vector_store.similarity_search_by_vector(v.tolist(), k=args.k) for v in vectors]
+    self_recall = recall([contents(index.docs[i] for i in row) for row in exact],
+                         [contents(docs) for docs in chroma_docs])
+    print(f"self-queries: numpy top-1 hit rate {self_hits:.3f}, "
+          f"chroma recall@{args.k} vs exact {self_recall:.3f}")
+
+    problems = []
+    if query_recall < args.min_recall:
+        problems.append(f"query recall {query_recall:.3f} is below {args.min_recall}")
+    if self_recall < args.min_recall:
+        problems.append(f"self-query recall {self_recall:.3f} is below {args.min_recall}")
+    if self_hits < 1.0:
+        problems.append(f"only {self_hits:.3f} of stored vectors retrieve themselves first")
+    if problems:
+        raise SystemExit("FAILED: " + "; ".join(problems))
+    print(f"OK: recall@{args.k} parity with Chroma within {args.min_recall}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Streamlit rerun time with the full chat history versus ChatHistory.
+
+Runs the app's chat rendering loop under streamlit.testing's AppTest with
+sessions of --turns question/answer turns already in session state:
+
+  full     every message in st.session_state.messages rendered with
+           st.markdown on every rerun (what app.py did)
+  history  src.chat_history.ChatHistory: a capped in-memory deque with the
+           rest spilled to SQLite, only the recent window rendered, and
+           cached HTML for past messages
+
+Also reports how many messages each session keeps in memory. Run from the
+repository root:
+
+    python -m benchmarks.bench_history --turns 10 100 1000
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from streamlit.testing.v1 import AppTest
+from benchmarks.common import percentile
+from src.chat_history import ChatHistory
+
+ANSWER = ("To apply for admission, submit the accomplished application form together with your report card "
+          "and a photocopy of your birth certificate to the Office of Admissions. ") * 3
+
+def full_script():
+    import streamlit as st
+    for i, message in enumerate(st.session_state.messages):
+        class_name = "last-message" if i == len(st.session_state.messages) - 1 else ""
+        with st.chat_message(message["role"]):
+            st.markdown(f'<div class="{class_name}">{message["content"]}</div>', unsafe_allow_html=True)
+
+def history_script():
+    import streamlit as st
+    history = st.session_state.history
+    if history.has_earlier():
+        st.button("Load earlier messages", on_click=history.load_earlier)
+    for message in history.window():
+        with st.chat_message(message["role"]):
+            st.markdown(history.html(message), unsafe_allow_html=True)
+
+def conversation(turns):
+    for i in range(turns):
+        yield "user", f"Question {i}: how do I apply for admission?"
+        yield "assistant", ANSWER
+
+def time_reruns(app, reruns):
+    """Run the app once to warm up, then return sorted rerun times in ms."""
+    app.run(timeout=60)
+    latencies = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        app.run(timeout=60)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return sorted(latencies)
+
+def run_turns(turns, reruns, workdir):
+    full = AppTest.from_function(full_script)
+    full.session_state.messages = [{"role": role, "content": content} for role, content in conversation(turns)]
+    latencies = time_reruns(full, reruns)
+    print(f"{turns:>6} {'full':>8} {2 * turns:>9} {len(full.markdown):>8} "
+          f"{percentile(latencies, 50):>8.1f} {percentile(latencies, 95):>8.1f}")
+
+    history = ChatHistory(f"bench-{turns}", db_path=os.path.join(workdir, "chat_history.sqlite3"))
+    for role, content in conversation(turns):
+        history.append(role, content)
+    windowed = AppTest.from_function(history_script)
+    windowed.session_state.history = history
+    latencies = time_reruns(windowed, reruns)
+    print(f"{turns:>6} {'history':>8} {len(history._messages):>9} {len(windowed.markdown):>8} "
+          f"{percentile(latencies, 50):>8.1f} {percentile(latencies, 95):>8.1f}")
+    history.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="psu_history_")
+    print(f"{'turns':>6} {'mode':>8} {'in_memory':>9} {'rendered':>8} {'p50_ms':>8} {'p95_ms':>8}")
+    try:
+        for turns in args.turns:
+            run_turns(turns, args.reruns, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
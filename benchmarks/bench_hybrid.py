@@ -0,0 +1,94 @@
+"""Retrieval latency of HybridRetriever versus langchain's EnsembleRetriever.
+
+By default the dense side is a stand-in that sleeps for --dense-ms to model
+the remote query-embedding round trip, and the sparse side is the real
+compiled BM25 index over the chunk store. Pass --live to use the real
+backend retrievers instead (needs HUGGINGFACEHUB_API_TOKEN and network).
+Both retrievers must return identical fused rankings. Run from the
+repository root:
+
+    python -m benchmarks.bench_hybrid --dense-ms 120 --repeats 20
+"""
+import argparse
+import hashlib
+import time
+from typing import List
+from langchain.retrievers import EnsembleRetriever
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from benchmarks.bench_bm25 import QUERIES, load_chunk_store
+from benchmarks.common import percentile
+from src.bm25_index import BM25Index, BM25IndexRetriever
+from src.retriever import HybridRetriever
+
+class SimulatedDenseRetriever(BaseRetriever):
+    """Dense retriever stand-in: fixed latency, deterministic pseudo-random results."""
+
+    docs: List[Document]
+    latency_ms: float
+    k: int = 5
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        time.sleep(self.latency_ms / 1000)
+        seed = int(hashlib.sha256(query.encode()).hexdigest(), 16)
+        return [self.docs[(seed >> (8 * i)) % len(self.docs)] for i in range(self.k)]
+
+def build_retrievers(args):
+    """Return the (dense, sparse) retriever pair to benchmark."""
+    if args.live:
+        from src.backend_config import get_shared_backend
+        backend, success, message = get_shared_backend()
+        if not success:
+            raise SystemExit(message)
+        return backend.vector_store.as_retriever(search_kwargs={"k": args.k}), \
+            BM25IndexRetriever(index=backend.bm25_index, docs=backend.chunks, k=args.k)
+
+    chunks, key = load_chunk_store(args.chunk_store)
+    index = BM25Index.load(args.index_dir, key) or BM25Index.build(chunks, args.index_dir, key)
+    return SimulatedDenseRetriever(docs=chunks, latency_ms=args.dense_ms, k=args.k), \
+        BM25IndexRetriever(index=index, docs=chunks, k=args.k)
+
+def measure(retriever, repeats):
+    """Return sorted per-query latencies in ms and the last result for each query."""
+    latencies = []
+    results = {}
+    for _ in range(repeats):
+        for query in QUERIES:
+            start = time.perf_counter()
+            results[query] = retriever.invoke(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return sorted(latencies), results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunk-store", default="chroma_db_cache/chunks.json")
+    parser.add_argument("--index-dir", default="chroma_db_cache/bm25")
+    parser.add_argument("--dense-ms", type=float, default=120.0)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    dense, sparse = build_retrievers(args)
+    candidates = {
+        "ensemble": EnsembleRetriever(retrievers=[dense, sparse], weights=[0.5, 0.5]),
+        "hybrid": HybridRetriever(retrievers=[dense, sparse], weights=[0.5, 0.5]),
+    }
+    outputs = {}
+    for name, retriever in candidates.items():
+        latencies, outputs[name] = measure(retriever, args.repeats)
+        print(f"{name:>9}: p50 {percentile(latencies, 50):.2f} ms, p95 {percentile(latencies, 95):.2f} ms")
+
+    mismatches = [
+        q for q in QUERIES
+        if [d.page_content for d in outputs["ensemble"][q]] != [d.page_content for d in outputs["hybrid"][q]]
+    ]
+    if mismatches:
+        raise SystemExit(f"Fused rankings differ on {len(mismatches)} queries: {mismatches}")
+    print(f"Fused rankings identical on all {len(QUERIES)} queries")
+
+if __name__ == "__main__":
+    main()
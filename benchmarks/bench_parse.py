@@ -0,0 +1,38 @@
+"""Ingest throughput of the page-sharded PDF parser as the worker count scales.
+
+For each worker count, parses and chunks the PDF, reports pages/sec and
+chunks/sec, and checks that the chunk list (text, page and start_index) is
+identical to the serial (workers=1) run. Run from the repository root:
+
+    python -m benchmarks.bench_parse --pdf data/charter_data.pdf --workers 1 2 4 8
+"""
+import argparse
+import time
+from src.data_processing import count_pages, load_and_chunk_pages
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdf", default="data/charter_data.pdf")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--pages-per-shard", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = count_pages(args.pdf)
+    reference = None
+    print(f"{args.pdf}: {pages} pages, {args.pages_per_shard} pages per shard")
+    print(f"{'workers':>7} {'seconds':>8} {'pages/s':>8} {'chunks/s':>9} {'identical':>9}")
+    for workers in sorted(args.workers):
+        best = float("inf")
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            chunks = load_and_chunk_pages(args.pdf, workers=workers, pages_per_shard=args.pages_per_shard)
+            best = min(best, time.perf_counter() - start)
+        signature = [(c.page_content, c.metadata["page"], c.metadata["start_index"]) for c in chunks]
+        if reference is None:
+            reference = signature
+        print(f"{workers:>7} {best:>8.3f} {pages / best:>8.1f} {len(chunks) / best:>9.1f} "
+              f"{str(signature == reference):>9}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Memory per worker, recall@k and latency of quantized memory-mapped dense indexes.
+
+For the charter corpus (the persisted Chroma collection) and a synthetic
+clustered corpus, builds float16 and int8 QuantizedDenseIndex files and
+starts --workers processes per mode that each load the index and run the
+same queries, the way several Streamlit or uvicorn workers would. Memory is
+read once every worker has finished, so PSS shows the shared page cache
+split between them; float32 is the in-memory DenseIndex baseline, one
+private copy per worker (about 3 GB each at the default synthetic size).
+recall@k is measured against exact float32 search.
+The synthetic corpus needs about 7 GB of temporary disk at the default
+size. Run from the repository root:
+
+    python -m benchmarks.bench_quantized --workers 4 --synthetic-size 1000000
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from benchmarks.common import memory_breakdown_mb, percentile
+from src.dense_index import DenseIndex, QuantizedDenseIndex, block_top_k
+
+# mode: (file dtype, rescore factor); float32 is the in-memory baseline
+MODES = {
+    "float32": (None, 0),
+    "float16": ("float16", 0),
+    "int8": ("int8", 0),
+    "int8+rescore": ("int8", 4),
+}
+
+def normalized(vectors):
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def run_worker(mode, workdir, k):
+    """Load one index, search every query, wait for the parent, then report memory."""
+    dtype, rescore = MODES[mode]
+    queries = np.load(os.path.join(workdir, "queries.npy"))
+    if dtype is None:
+        index = DenseIndex(np.load(os.path.join(workdir, "source.npy")), [])
+    else:
+        index = QuantizedDenseIndex.load(os.path.join(workdir, dtype), "bench", rescore)
+    latencies = []
+    indices = []
+    for query in queries:
+        start = time.perf_counter()
+        top, _ = index.search(query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        indices.append(top[0].tolist())
+    print("ready", flush=True)
+    sys.stdin.readline()
+    print(json.dumps(dict(memory_breakdown_mb(), latencies=latencies, indices=indices)), flush=True)
+
+def measure_mode(mode, workdir, args):
+    """Run --workers worker processes concurrently and return their reports."""
+    command = [sys.executable, "-m", "benchmarks.bench_quantized", "--worker", mode,
+               "--workdir", workdir, "--k", str(args.k)]
+    workers = [subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+               for _ in range(args.workers)]
+    for worker in workers:
+        if worker.stdout.readline().strip() != "ready":
+            raise SystemExit(f"{mode} worker failed")
+    reports = []
+    for worker in workers:
+        worker.stdin.write("\n")
+        worker.stdin.flush()
+        reports.append(json.loads(worker.stdout.readline()))
+        worker.wait()
+    return reports
+
+def run_corpus(name, workdir, args):
+    """Build the quantized files from workdir/source.npy and print one row per mode."""
+    source = np.load(os.path.join(workdir, "source.npy"), mmap_mode="r")
+    for dtype, keep_full in (("float16", False), ("int8", True)):
+        start = time.perf_counter()
+        QuantizedDenseIndex.build(source, [], os.path.join(workdir, dtype), "bench", dtype, keep_full)
+        # The file sits in the key's versioned subdirectory
+        size_mb = sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(os.path.join(workdir, dtype))
+                      for f in files if f == "vectors.bin") / 2**20
+        print(f"{name}: built {dtype} file ({size_mb:.0f} MB) in {time.perf_counter() - start:.1f} s")
+
+    rng = np.random.default_rng(args.seed)
+    rows = rng.choice(len(source), size=min(args.queries, len(source)), replace=False)
+    base = np.asarray(source[np.sort(rows)], dtype=np.float32)
+    queries = normalized(base + args.query_noise * rng.standard_normal(base.shape).astype(np.float32)
+                         / np.sqrt(base.shape[1]))
+    np.save(os.path.join(workdir, "queries.npy"), queries)
+    truth, _ = block_top_k(source, queries, args.k)
+
+    print(f"{'corpus':>9} {'mode':>13} {'rss_mb':>8} {'pss_mb':>8} {'private_mb':>10} "
+          f"{'recall@' + str(args.k):>9} {'p50_ms':>8} {'p95_ms':>8}")
+    for mode in MODES:
+        reports = measure_mode(mode, workdir, args)
+        latencies = sorted(ms for report in reports for ms in report["latencies"])
+        found = reports[0]["indices"]
+        recall = np.mean([len(set(t) & set(f)) / len(t) for t, f in zip(truth.tolist(), found)])
+        mean = lambda field: np.mean([report.get(field, 0.0) for report in reports])
+        print(f"{name:>9} {mode:>13} {mean('rss_mb'):>8.1f} {mean('pss_mb'):>8.1f} {mean('private_mb'):>10.1f} "
+              f"{recall:>9.3f} {percentile(latencies, 50):>8.2f} {percentile(latencies, 95):>8.2f}")
+
+def write_charter_source(workdir, persist_directory):
+    from benchmarks.bench_dense import open_collection
+    _, vector_store = open_collection(persist_directory)
+    data = vector_store._collection.get(include=["embeddings"])
+    np.save(os.path.join(workdir, "source.npy"), normalized(np.asarray(data["embeddings"], dtype=np.float32)))
+
+def write_synthetic_source(workdir, args, block_rows=65536):
+    """Write a clustered corpus of unit vectors, so neighbourhoods are meaningful."""
+    rng = np.random.default_rng(args.seed)
+    centers = rng.standard_normal((args.clusters, args.dimension)).astype(np.float32)
+    source = np.lib.format.open_memmap(os.path.join(workdir, "source.npy"), mode="w+", dtype=np.float32,
+                                       shape=(args.synthetic_size, args.dimension))
+    for start in range(0, args.synthetic_size, block_rows):
+        rows = min(block_rows, args.synthetic_size - start)
+        noise = rng.standard_normal((rows, args.dimension)).astype(np.float32)
+        source[start:start + rows] = normalized(centers[rng.integers(0, args.clusters, rows)] + args.spread * noise)
+    source.flush()
+    del source
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--persist-directory", default="chroma_db")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--query-noise", type=float, default=0.5)
+    parser.add_argument("--synthetic-size", type=int, default=1000000, help="0 skips the synthetic corpus")
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=10000)
+    parser.add_argument("--spread", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--worker", choices=list(MODES), help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.workdir, args.k)
+        return
+
+    corpora = [("charter", lambda workdir: write_charter_source(workdir, args.persist_directory))]
+    if args.synthetic_size:
+        corpora.append(("synthetic", lambda workdir: write_synthetic_source(workdir, args)))
+    for name, write_source in corpora:
+        workdir = tempfile.mkdtemp(prefix="psu_quantized_")
+        try:
+            write_source(workdir)
+            run_corpus(name, workdir, args)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Cost and benefit of the cross-encoder reranking stage.
+
+Initializes a backend on the local stand-ins from benchmarks/stubs.py (no
+token or network), then builds the chain with different retrieval setups:
+
+  k=5              the default hybrid retriever
+  k=10             over-fetching, without reranking
+  rerank           10 candidates per retriever reranked down to --top-n
+  rerank+thresh    the same, dropping chunks below --threshold with early exit
+
+The reranker is StubReranker (query-term overlap with simulated per-call
+and per-pair latency), so this shows the latency trade-off, not answer
+quality. The LLM stand-in's latency grows with prompt length
+(--prompt-token-ms). Reported per setup: retrieval time with a cold and a
+warm rerank score cache, pairs scored per query in the cold pass
+(candidates after an early exit are never scored), documents kept, prompt
+tokens and end-to-end chain time (with warm score caches). Run from the
+repository root:
+
+    python -m benchmarks.bench_rerank --data-dir data
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from benchmarks.bench_bm25 import QUERIES
+from benchmarks.common import percentile
+from benchmarks.stubs import StubEmbeddings, StubLLM, StubReranker
+from src.backend_config import PSUChatBackend
+from src.embeddings import CachedEmbeddings
+from src.llm import assemble_chain, count_tokens, setup_prompt_template
+from src.retriever import setup_retrievers
+
+def timed_pass(fn, queries):
+    """Call fn on each query and return sorted latencies in ms."""
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return sorted(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdf", default="data/charter_data.pdf")
+    parser.add_argument("--data-dir")
+    parser.add_argument("--top-n", type=int, default=4)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--pair-ms", type=float, default=2.0)
+    parser.add_argument("--first-token-ms", type=float, default=200.0)
+    parser.add_argument("--prompt-token-ms", type=float, default=0.5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="psu_rerank_")
+    try:
+        backend = PSUChatBackend(os.path.join(workdir, "chroma_db"), persist_response_cache=False)
+        embeddings = CachedEmbeddings(StubEmbeddings(call_latency_ms=0, text_latency_ms=0))
+        llm = StubLLM(first_token_ms=args.first_token_ms, token_ms=0, prompt_token_ms=args.prompt_token_ms)
+        success, message = backend.initialize_system(args.pdf, llm=llm, embeddings=embeddings,
+                                                     data_dir=args.data_dir)
+        if not success:
+            raise SystemExit(message)
+        prompt, output_parser = setup_prompt_template()
+        setups = [
+            ("k=5", {"k": 5}),
+            ("k=10", {"k": 10}),
+            ("rerank", {"rerank_k": 10, "rerank_top_n": args.top_n}),
+            ("rerank+thresh", {"rerank_k": 10, "rerank_top_n": args.top_n, "rerank_threshold": args.threshold}),
+        ]
+        print(f"{'setup':>14} {'cold_ms':>8} {'warm_ms':>8} {'pairs':>6} {'docs':>5} {'prompt_tokens':>13} "
+              f"{'chain_p50_ms':>12} {'chain_p95_ms':>12}")
+        for name, options in setups:
+            reranker = StubReranker(pair_latency_ms=args.pair_ms) if "rerank_k" in options else None
+            retriever = setup_retrievers(backend.vector_store, backend.chunks, backend.bm25_index,
+                                         reranker=reranker, **options)
+            cold = timed_pass(retriever.invoke, QUERIES)
+            # Later passes reuse the cached scores, so only the cold pass sends pairs to the model
+            pairs = reranker.pairs / len(QUERIES) if reranker else 0
+            warm = timed_pass(retriever.invoke, QUERIES)
+            docs = statistics.mean(len(retriever.invoke(q)) for q in QUERIES)
+            chain = assemble_chain(retriever, prompt, llm, output_parser, backend.max_context_tokens)
+            prompt_chain = chain.first | prompt  # the {"context", "query"} map followed by the prompt
+            tokens = statistics.mean(count_tokens(prompt_chain.invoke(q).to_string()) for q in QUERIES)
+            latencies = timed_pass(chain.invoke, QUERIES)
+            print(f"{name:>14} {percentile(cold, 50):>8.1f} {percentile(warm, 50):>8.1f} {pairs:>6.1f} "
+                  f"{docs:>5.1f} {tokens:>13.0f} {percentile(latencies, 50):>12.1f} "
+                  f"{percentile(latencies, 95):>12.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
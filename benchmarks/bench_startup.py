@@ -0,0 +1,112 @@
+"""Startup time of PSUChatBackend broken down into import, index load and warmup.
+
+Uses the local stand-ins from benchmarks/stubs.py (with simulated embedding
+latency), so it needs no token or network. Stages:
+
+  import       importing src.backend_config in a fresh interpreter, and which
+               heavy modules that import loaded
+  cold_init    the first initialize_system on empty directories
+  warm_init    initialize_system in a fresh process on the built directories,
+               per initialization step
+  warmup       backend.warmup on the app's example questions
+  first_query  the first example question and an unseen question, run
+               through the chain with and without warmup
+
+Run from the repository root (--data-dir uses the page-sharded ingest path
+instead of the single PDF):
+
+    python -m benchmarks.bench_startup --data-dir data
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.bench_bm25 import QUERIES
+
+# The app's sidebar example questions
+EXAMPLE_QUESTIONS = QUERIES[:4]
+HEAVY_MODULES = ("langchain_community", "chromadb", "unstructured", "torch", "transformers",
+                 "sentence_transformers")
+
+def measure_import():
+    """Return (ms, heavy modules loaded) for importing the backend in a fresh interpreter."""
+    code = (
+        "import json, sys, time; t = time.perf_counter(); import src.backend_config; "
+        "elapsed = time.perf_counter() - t; "
+        f"print(json.dumps([elapsed, [m for m in {HEAVY_MODULES!r} if m in sys.modules]]))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    elapsed, heavy = json.loads(output.strip().splitlines()[-1])
+    return round(elapsed * 1000, 1), heavy
+
+def init_backend(args, persist):
+    """Initialize a backend on stubs and return (backend, init ms)."""
+    from benchmarks.stubs import StubEmbeddings, StubLLM
+    from src.backend_config import PSUChatBackend
+    from src.embeddings import CachedEmbeddings
+
+    embeddings = CachedEmbeddings(StubEmbeddings(call_latency_ms=args.embed_call_ms,
+                                                 text_latency_ms=args.embed_text_ms))
+    llm = StubLLM(first_token_ms=args.llm_first_token_ms, token_ms=0)
+    backend = PSUChatBackend(persist, persist_response_cache=False)
+    start = time.perf_counter()
+    success, message = backend.initialize_system(args.pdf, llm=llm, embeddings=embeddings, data_dir=args.data_dir)
+    if not success:
+        raise SystemExit(message)
+    return backend, (time.perf_counter() - start) * 1000
+
+def run_child(args):
+    """Warm-start a backend in this fresh process and print its timings as JSON."""
+    backend, init_ms = init_backend(args, args.child)
+    result = {"init_ms": round(init_ms, 1),
+              "steps_ms": {name: round(s * 1000, 1) for name, s in backend.init_timings.items()}}
+    if args.warmup:
+        backend.start_warmup(EXAMPLE_QUESTIONS).join()
+        result["warmup_ms"] = round((backend.warmup_seconds or 0.0) * 1000, 1)
+    for label, query in (("example", EXAMPLE_QUESTIONS[0]), ("unseen", QUERIES[-1])):
+        start = time.perf_counter()
+        backend.chain.invoke(query)
+        result[f"first_{label}_query_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    print(json.dumps(result))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdf", default="data/charter_data.pdf")
+    parser.add_argument("--data-dir")
+    parser.add_argument("--embed-call-ms", type=float, default=50.0)
+    parser.add_argument("--embed-text-ms", type=float, default=1.0)
+    parser.add_argument("--llm-first-token-ms", type=float, default=100.0)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--warmup", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    import_ms, heavy = measure_import()
+    results = {"import": {"ms": import_ms, "heavy_modules_loaded": heavy}}
+    workdir = tempfile.mkdtemp(prefix="psu_startup_")
+    try:
+        persist = os.path.join(workdir, "chroma_db")
+        _, cold_ms = init_backend(args, persist)
+        results["cold_init"] = {"ms": round(cold_ms, 1)}
+
+        command = [sys.executable, "-m", "benchmarks.bench_startup", "--child", persist, "--pdf", args.pdf,
+                   "--embed-call-ms", str(args.embed_call_ms), "--embed-text-ms", str(args.embed_text_ms),
+                   "--llm-first-token-ms", str(args.llm_first_token_ms)]
+        if args.data_dir:
+            command += ["--data-dir", args.data_dir]
+        for label, extra in (("warm_init", []), ("warm_init_with_warmup", ["--warmup"])):
+            output = subprocess.run(command + extra, check=True, capture_output=True, text=True).stdout
+            results[label] = json.loads(output.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
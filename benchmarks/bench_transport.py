@@ -0,0 +1,122 @@
+"""Shared inference transport versus one-off HTTP calls, against the mock server.
+
+Starts benchmarks/mock_inference_server.py with a slow tail and injected
+503s, then sends the same embedding requests from --concurrency threads:
+
+  direct           a new requests.post per call, no retries (what each
+                   langchain HuggingFace client did)
+  transport        src.transport.InferenceTransport: pooled, rate-limited,
+                   retrying with backoff and jitter
+  transport+hedge  the same, hedging requests slower than --hedge-ms
+
+It then restarts the server failing every request and shows the circuit
+breaker failing fast instead of waiting on the upstream. Run from the
+repository root:
+
+    python -m benchmarks.bench_transport --requests 400 --concurrency 16
+"""
+import argparse
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from benchmarks.common import percentile
+from src.transport import CircuitOpenError, InferenceTransport, TransportError
+
+PATH = "/pipeline/feature-extraction/BAAI/bge-base-en-v1.5"
+
+def start_server(args, error_rate):
+    command = [sys.executable, "-m", "benchmarks.mock_inference_server", "--port", str(args.port),
+               "--latency-ms", str(args.latency_ms), "--tail-ms", str(args.tail_ms),
+               "--tail-rate", str(args.tail_rate), "--error-rate", str(error_rate)]
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    server.stdout.readline()  # wait until it is listening
+    return server
+
+def stop_server(server):
+    server.terminate()
+    server.wait()
+
+def server_stats(args):
+    return requests.get(f"http://127.0.0.1:{args.port}/stats", timeout=5).json()
+
+def run(send, args):
+    """Send --requests embedding requests and return (latencies in ms, errors, elapsed s)."""
+    def one(i):
+        start = time.perf_counter()
+        try:
+            send({"inputs": [f"query {i}"], "options": {"wait_for_model": True}})
+            ok = True
+        except (TransportError, requests.RequestException):
+            ok = False
+        return ok, (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(one, range(args.requests)))
+    return sorted(ms for _, ms in results), sum(1 for ok, _ in results if not ok), time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8091)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--tail-ms", type=float, default=1500.0)
+    parser.add_argument("--tail-rate", type=float, default=0.03)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--hedge-ms", type=float, default=200.0)
+    args = parser.parse_args()
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    def direct(payload):
+        response = requests.post(f"{base_url}{PATH}", json=payload, timeout=60)
+        response.raise_for_status()
+        return response.json()
+
+    def transport(**options):
+        client = InferenceTransport(base_url=base_url, max_concurrency=args.concurrency,
+                                    pool_size=args.concurrency, rate_per_second=None, backoff_base=0.05,
+                                    **options)
+        return lambda payload: client.post(PATH, payload)
+
+    modes = [("direct", direct), ("transport", transport()),
+             ("transport+hedge", transport(hedge_after_ms=args.hedge_ms))]
+    print(f"{'mode':>16} {'errors':>6} {'conns':>6} {'upstream':>8} {'qps':>7} "
+          f"{'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8}")
+    for name, send in modes:
+        server = start_server(args, args.error_rate)
+        try:
+            latencies, errors, elapsed = run(send, args)
+            stats = server_stats(args)
+        finally:
+            stop_server(server)
+        print(f"{name:>16} {errors:>6} {stats['connections'] - 1:>6} {stats['requests']:>8} "
+              f"{len(latencies) / elapsed:>7.1f} {percentile(latencies, 50):>8.1f} "
+              f"{percentile(latencies, 95):>8.1f} {percentile(latencies, 99):>8.1f}")
+
+    server = start_server(args, 1.0)
+    try:
+        client = InferenceTransport(base_url=base_url, rate_per_second=None, backoff_base=0.05,
+                                    failure_threshold=5, reset_timeout=30.0)
+        latencies = []
+        rejected = 0
+        for i in range(50):
+            start = time.perf_counter()
+            try:
+                client.post(PATH, {"inputs": [f"query {i}"]})
+            except CircuitOpenError:
+                rejected += 1
+            except TransportError:
+                pass
+            latencies.append((time.perf_counter() - start) * 1000)
+        stats = server_stats(args)
+    finally:
+        stop_server(server)
+    print(f"upstream down: {rejected}/50 calls rejected by the open circuit in "
+          f"{percentile(sorted(latencies[-rejected:] or [0.0]), 50):.3f} ms (p50); "
+          f"{stats['requests']} requests reached the upstream")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Check that IndexRegistry serves many collections within a fixed RSS ceiling.
+
+Builds --collections synthetic collections the way the backend leaves them
+on disk (a chunk store and a Chroma directory per collection, with a
+placeholder file standing in for each PDF). It then opens each collection
+from --threads threads at once, which must all get the same backend from a
+single load, and finally queries every collection from --threads threads
+in a shuffled order. Everything runs on the local stand-ins from
+benchmarks/stubs.py.
+
+The serving phase runs in a fresh process twice: with --budget-mb, and
+with an unlimited budget for comparison. Peak RSS is sampled throughout;
+the check fails (exit status 1) if the budgeted run exceeds
+--rss-ceiling-mb, if concurrent first access loaded any collection more
+than once, or if any query failed. Run from the repository root:
+
+    python -m benchmarks.check_registry --collections 50 --budget-mb 64 --rss-ceiling-mb 300
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.common import current_rss_mb
+
+def build_collections(args, root):
+    """Write each synthetic collection's placeholder PDF, chunk store and Chroma directory."""
+    from langchain_community.vectorstores import Chroma
+    from langchain_core.documents import Document
+    from benchmarks.stubs import StubEmbeddings
+    from src.backend_config import PSUChatBackend
+    from src.data_processing import chunk_store_key, save_chunks
+
+    embeddings = StubEmbeddings(call_latency_ms=0, text_latency_ms=0)
+    for i in range(args.collections):
+        name = f"office{i:03d}"
+        pdf_path = os.path.join(root, "data", f"{name}.pdf")
+        os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
+        with open(pdf_path, "w", encoding="utf-8") as f:
+            f.write(f"placeholder for {name}\n")
+        backend = PSUChatBackend(os.path.join(root, name, "chroma_db"), persist_response_cache=False)
+        chunks = [
+            Document(page_content=f"{name} service {j}: submit form {j} to the {name} office with a valid "
+                                  f"ID, pay the fee of {j} pesos and wait {j % 7 + 1} working days. " * 4,
+                     metadata={"source": pdf_path, "page": j // 10})
+            for j in range(args.chunks)
+        ]
+        save_chunks(chunks, backend.chunk_store_path, chunk_store_key(pdf_path, backend.chunk_size,
+                                                                      backend.chunk_overlap))
+        store = Chroma.from_documents(chunks, embeddings, persist_directory=backend.persist_directory)
+        store._client.close()
+
+def sample_peak_rss(stop, peak):
+    while not stop.is_set():
+        peak[0] = max(peak[0], current_rss_mb())
+        time.sleep(0.02)
+
+def serve(args, root, budget_mb):
+    """Query every collection through one registry and print the results as JSON."""
+    from benchmarks.stubs import StubEmbeddings, StubLLM
+    from src.index_registry import IndexRegistry
+
+    registry = IndexRegistry(root, memory_budget_mb=budget_mb, persist_response_cache=False,
+                             embeddings=StubEmbeddings(call_latency_ms=0, text_latency_ms=0),
+                             llm=StubLLM(first_token_ms=0, token_ms=0, answer_tokens=8))
+    names = sorted(n for n in os.listdir(root) if n.startswith("office"))
+    for name in names:
+        registry.register(name, pdf_path=os.path.join(root, "data", f"{name}.pdf"))
+    start_rss = current_rss_mb()
+    stop = threading.Event()
+    peak = [start_rss]
+    sampler = threading.Thread(target=sample_peak_rss, args=(stop, peak), daemon=True)
+    sampler.start()
+    started = time.perf_counter()
+
+    # Every thread asks for the same unloaded collection at once; one load must serve them all
+    duplicate_loads = 0
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        for name in names:
+            barrier = threading.Barrier(args.threads)
+
+            def first_access(_):
+                barrier.wait()
+                with registry.lease(name) as backend:
+                    return backend
+
+            backends = list(pool.map(first_access, range(args.threads)))
+            duplicate_loads += len({id(backend) for backend in backends}) - 1
+
+    requests = [(name, f"How do I get service {j} from {name}?")
+                for name in names for j in range(args.queries_per_collection)]
+    random.Random(0).shuffle(requests)
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(lambda request: registry.generate_response(*request), requests))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    sampler.join()
+    print(json.dumps({
+        "budget_mb": budget_mb,
+        "queries": len(requests),
+        "failed": sum(1 for success, _ in results if not success),
+        "duplicate_loads": duplicate_loads,
+        "loads": registry.loads,
+        "evictions": registry.evictions,
+        "loaded_at_end": len(registry.loaded),
+        "estimated_mb_at_end": round(registry.memory_used / 1024 / 1024, 1),
+        "start_rss_mb": round(start_rss, 1),
+        "peak_rss_mb": round(peak[0], 1),
+        "seconds": round(elapsed, 1),
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--collections", type=int, default=50)
+    parser.add_argument("--chunks", type=int, default=400)
+    parser.add_argument("--queries-per-collection", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--budget-mb", type=float, default=64.0)
+    parser.add_argument("--rss-ceiling-mb", type=float, default=300.0)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--child-budget-mb", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        serve(args, args.child, args.child_budget_mb)
+        return
+
+    root = tempfile.mkdtemp(prefix="psu_registry_")
+    try:
+        start = time.perf_counter()
+        build_collections(args, root)
+        print(f"built {args.collections} collections of {args.chunks} chunks in "
+              f"{time.perf_counter() - start:.1f} s")
+        runs = {}
+        for label, budget_mb in (("budgeted", args.budget_mb), ("unlimited", 1e9)):
+            command = [sys.executable, "-m", "benchmarks.check_registry", "--child", root,
+                       "--child-budget-mb", str(budget_mb), "--threads", str(args.threads),
+                       "--queries-per-collection", str(args.queries_per_collection)]
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+            runs[label] = json.loads(output.strip().splitlines()[-1])
+            print(f"{label}: {json.dumps(runs[label])}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    budgeted = runs["budgeted"]
+    problems = []
+    if budgeted["peak_rss_mb"] > args.rss_ceiling_mb:
+        problems.append(f"peak RSS {budgeted['peak_rss_mb']} MB exceeds the {args.rss_ceiling_mb} MB ceiling")
+    if budgeted["duplicate_loads"]:
+        problems.append(f"concurrent first access loaded collections {budgeted['duplicate_loads']} extra times")
+    if budgeted["failed"]:
+        problems.append(f"{budgeted['failed']} queries failed")
+    if problems:
+        raise SystemExit("FAILED: " + "; ".join(problems))
+    print(f"OK: {args.collections} collections served with peak RSS {budgeted['peak_rss_mb']} MB "
+          f"(ceiling {args.rss_ceiling_mb} MB, {runs['unlimited']['peak_rss_mb']} MB without a budget)")
+
+if __name__ == "__main__":
+    main()
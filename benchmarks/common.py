@@ -0,0 +1,42 @@
+import resource
+
+def current_rss_mb():
+    """Return the current resident set size of this process in MB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def memory_breakdown_mb():
+    """Return this process's RSS, PSS and private memory in MB (empty off Linux).
+
+    PSS divides each shared page by the number of processes mapping it, so
+    it shows what a worker really costs when several share a file mapping.
+    """
+    fields = {"Rss:": "rss_mb", "Pss:": "pss_mb", "Private_Clean:": "private_mb", "Private_Dirty:": "private_mb"}
+    result = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if parts and parts[0] in fields:
+                    name = fields[parts[0]]
+                    result[name] = result.get(name, 0.0) + int(parts[1]) / 1024
+    except OSError:
+        pass
+    return result
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process in MB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def percentile(sorted_values, pct):
+    """Return the nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
@@ -0,0 +1,96 @@
+"""Load test for the process-wide shared backend.
+
+Simulates a growing number of concurrent sessions, each racing to fetch the
+shared backend the way app.py does on its first rerun and then holding only
+its own ChatHistory. Each session then adds --turns question/answer turns
+and renders its window, so histories past the in-memory cap spill to their
+per-session files. Reports how many initializations ran, the process RSS at
+each level (which should stay flat as sessions grow) and the messages held
+in memory and spilled; at the end every session is closed and its spill
+file must be gone. Run from the repository root:
+
+    python -m benchmarks.load_sessions --sessions 1 10 50 100 200
+"""
+import argparse
+import os
+import threading
+import time
+import uuid
+from benchmarks.common import current_rss_mb
+from src import backend_config
+from src.chat_history import ChatHistory
+
+WELCOME = "Hello! I'm the ParSU Citicharbot. What would you like to know?"
+ANSWER = "Submit the accomplished form with a valid ID to the Registrar and pay the fee at the Cashier."
+
+def count_initializations():
+    """Patch PSUChatBackend.initialize_system to count how often it runs."""
+    calls = []
+    original = backend_config.PSUChatBackend.initialize_system
+
+    def counted(self, *args, **kwargs):
+        calls.append(time.perf_counter())
+        return original(self, *args, **kwargs)
+
+    backend_config.PSUChatBackend.initialize_system = counted
+    return calls
+
+def open_sessions(n, sessions, turns, barrier_timeout=60):
+    """Open n new sessions concurrently and append them to sessions."""
+    barrier = threading.Barrier(n, timeout=barrier_timeout)
+    errors = []
+
+    def session():
+        barrier.wait()
+        backend, success, message = backend_config.get_shared_backend()
+        if not success:
+            errors.append(message)
+        history = ChatHistory(uuid.uuid4().hex)
+        history.append("assistant", WELCOME)
+        for i in range(turns):
+            history.append("user", f"Question {i}: how do I request my transcript?")
+            history.append("assistant", ANSWER)
+        # What app.py renders on each rerun
+        for message in history.window():
+            history.html(message)
+        sessions.append(history)
+
+    threads = [threading.Thread(target=session) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50, 100, 200])
+    parser.add_argument("--turns", type=int, default=40, help="question/answer turns per session")
+    args = parser.parse_args()
+
+    init_calls = count_initializations()
+    sessions = []
+    baseline = current_rss_mb()
+    print(f"{'sessions':>8} {'inits':>6} {'rss_mb':>8} {'delta_mb':>9} {'in_memory':>9} {'spilled':>8} "
+          f"{'open_s':>7}")
+    for target in sorted(args.sessions):
+        start = time.perf_counter()
+        errors = open_sessions(target - len(sessions), sessions, args.turns) if target > len(sessions) else []
+        if errors:
+            raise SystemExit(f"Initialization failed: {errors[0]}")
+        rss = current_rss_mb()
+        in_memory = sum(len(history._messages) for history in sessions)
+        spilled = sum(history._spilled for history in sessions)
+        print(f"{len(sessions):>8} {len(init_calls):>6} {rss:>8.1f} {rss - baseline:>9.1f} {in_memory:>9} "
+              f"{spilled:>8} {time.perf_counter() - start:>7.2f}")
+
+    spill_files = [history.db_path for history in sessions if history.db_path]
+    for history in sessions:
+        history.close()
+    left = [path for path in spill_files if os.path.exists(path)]
+    if left:
+        raise SystemExit(f"FAILED: {len(left)} spill files remain after closing their sessions")
+    print(f"OK: closed {len(sessions)} sessions and removed {len(spill_files)} spill files")
+
+if __name__ == "__main__":
+    main()
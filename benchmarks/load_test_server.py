@@ -0,0 +1,119 @@
+"""HTTP load test for the async query service, using stub LLM and embeddings.
+
+Starts src.server on a local port over a PSUChatBackend whose chain uses the
+real compiled BM25 index with stub dense retrieval, stub embeddings and a
+stub LLM. Then it fires concurrent POST /query requests drawn from a small
+set of distinct questions. Reports throughput, latency percentiles, status
+codes (429 = shed load), and how many upstream LLM and embedding calls the
+micro-batching and coalescing needed. Run from the repository root:
+
+    python -m benchmarks.load_test_server --concurrency 64 --requests 1000
+"""
+import argparse
+import json
+import random
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import uvicorn
+from benchmarks.bench_bm25 import QUERIES, load_chunk_store
+from benchmarks.common import percentile
+from benchmarks.stubs import StubDenseRetriever, StubEmbeddings, StubLLM
+from src.backend_config import PSUChatBackend
+from src.bm25_index import BM25Index, BM25IndexRetriever
+from src.embeddings import CachedEmbeddings
+from src.llm import setup_prompt_template, assemble_chain
+from src.retriever import HybridRetriever
+from src.server import create_app
+
+def build_stub_backend(args):
+    """Return an initialized backend wired to stub embeddings and LLM."""
+    chunks, key = load_chunk_store(args.chunk_store)
+    index = BM25Index.load(args.index_dir, key) or BM25Index.build(chunks, args.index_dir, key)
+    embeddings = CachedEmbeddings(StubEmbeddings(call_latency_ms=args.embed_ms))
+    llm = StubLLM(first_token_ms=args.llm_ms, token_ms=0)
+    retriever = HybridRetriever(
+        retrievers=[StubDenseRetriever(embeddings=embeddings, docs=chunks),
+                    BM25IndexRetriever(index=index, docs=chunks, k=5)],
+        weights=[0.5, 0.5],
+    )
+    prompt, output_parser = setup_prompt_template()
+
+    backend = PSUChatBackend(persist_directory=tempfile.mkdtemp(prefix="psu_load_"))
+    backend.embeddings = embeddings
+    backend.chunks = chunks
+    backend.chain = assemble_chain(retriever, prompt, llm, output_parser)
+    backend.is_initialized = True
+    return backend, embeddings.base, llm
+
+def post(url, query):
+    """POST a query and return (status, latency_ms)."""
+    request = urllib.request.Request(url, data=json.dumps({"query": query}).encode(),
+                                     headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunk-store", default="chroma_db_cache/chunks.json")
+    parser.add_argument("--index-dir", default="chroma_db_cache/bm25")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--distinct", type=int, default=len(QUERIES) * 4)
+    parser.add_argument("--llm-ms", type=float, default=300.0)
+    parser.add_argument("--embed-ms", type=float, default=50.0)
+    parser.add_argument("--batch-window-ms", type=float, default=10.0)
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-concurrent-batches", type=int, default=4)
+    parser.add_argument("--max-pending", type=int, default=64)
+    args = parser.parse_args()
+
+    backend, embeddings, llm = build_stub_backend(args)
+    app = create_app(backend, args.batch_window_ms, args.max_batch_size,
+                     args.max_concurrent_batches, args.max_pending)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    rng = random.Random(0)
+    distinct = [f"{QUERIES[i % len(QUERIES)]} ({i // len(QUERIES)})" for i in range(args.distinct)]
+    workload = [rng.choice(distinct) for _ in range(args.requests)]
+    url = f"http://127.0.0.1:{args.port}/query"
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda q: post(url, q), workload))
+    elapsed = time.perf_counter() - start
+    server.should_exit = True
+
+    statuses = Counter(status for status, _ in results)
+    latencies = sorted(ms for status, ms in results if status == 200)
+    batcher = app.state["batcher"]
+    print(json.dumps({
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "throughput_rps": round(args.requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "status_counts": dict(statuses),
+        "batches": batcher.batches,
+        "coalesced_requests": batcher.coalesced,
+        "llm_calls": llm.calls,
+        "embedding_calls": embeddings.calls,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Local stand-in for the HuggingFace Inference API.
+
+Serves the two endpoints the app uses, with configurable latency, a slow
+tail and injected failures, so src.transport can be exercised offline:
+
+  POST /models/<repo_id>                       text generation (streamed as
+                                               server-sent events with "stream": true)
+  POST /pipeline/feature-extraction/<model>    hash-seeded unit vectors
+  GET  /stats                                  request and connection counts
+
+Point the app at it with HF_INFERENCE_URL=http://127.0.0.1:8081. Run from
+the repository root:
+
+    python -m benchmarks.mock_inference_server --latency-ms 50 --tail-rate 0.05 --error-rate 0.02
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class MockInferenceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms=50.0, tail_ms=1000.0, tail_rate=0.0, error_rate=0.0,
+                 token_ms=5.0, answer_tokens=32, dimension=768, seed=0):
+        super().__init__(address, MockInferenceHandler)
+        self.latency_ms = latency_ms
+        self.tail_ms = tail_ms
+        self.tail_rate = tail_rate
+        self.error_rate = error_rate
+        self.token_ms = token_ms
+        self.answer_tokens = answer_tokens
+        self.dimension = dimension
+        self.random = random.Random(seed)
+        self.stats = {"connections": 0, "requests": 0, "errors": 0, "slow": 0}
+        self.lock = threading.Lock()
+
+    def count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def draw(self):
+        with self.lock:
+            return self.random.random(), self.random.random()
+
+class MockInferenceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so client connection reuse is visible in /stats
+
+    def setup(self):
+        super().setup()
+        self.server.count("connections")
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send_json(200, self.server.stats)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        self.server.count("requests")
+        failure, slow = self.server.draw()
+        delay = self.server.latency_ms
+        if slow < self.server.tail_rate:
+            self.server.count("slow")
+            delay = self.server.tail_ms
+        time.sleep(delay / 1000)
+        if failure < self.server.error_rate:
+            self.server.count("errors")
+            self._send_json(503, {"error": "Model is overloaded"}, {"Retry-After": "0"})
+            return
+
+        if self.path.startswith("/pipeline/feature-extraction/"):
+            texts = payload.get("inputs", [])
+            self._send_json(200, [self._vector(text) for text in ([texts] if isinstance(texts, str) else texts)])
+        elif self.path.startswith("/models/"):
+            tokens = [f"word{i} " for i in range(self.server.answer_tokens)]
+            if payload.get("stream"):
+                self._stream_tokens(tokens)
+            else:
+                self._send_json(200, [{"generated_text": "".join(tokens)}])
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _vector(self, text):
+        rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+        vector = [rng.gauss(0.0, 1.0) for _ in range(self.server.dimension)]
+        norm = math.sqrt(sum(x * x for x in vector))
+        return [x / norm for x in vector]
+
+    def _stream_tokens(self, tokens):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, text in enumerate(tokens):
+            if i:
+                time.sleep(self.server.token_ms / 1000)
+            event = {"token": {"id": i, "text": text, "special": False}}
+            data = f"data:{json.dumps(event)}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--tail-ms", type=float, default=1000.0)
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="fraction of requests taking --tail-ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--token-ms", type=float, default=5.0)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = MockInferenceServer((args.host, args.port), args.latency_ms, args.tail_ms, args.tail_rate,
+                                 args.error_rate, args.token_ms, dimension=args.dimension, seed=args.seed)
+    print(f"Mock inference server listening on http://{args.host}:{args.port}", flush=True)
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Offline end-to-end benchmark of PSUChatBackend with local stand-ins.
+
+Swaps the HuggingFace LLM and embedding clients for the deterministic stubs
+in benchmarks/stubs.py (with configurable simulated latency) and drives the
+real pipeline through:
+
+  import      importing src.backend_config
+  cold_init   initialize_system on an empty Chroma directory (parse, embed, index)
+  warm_init   initialize_system again on the same directories
+  ingest      incremental ingestion of a data directory, then a no-op re-run
+  workload    a replayed query workload, sequential and concurrent
+
+Results (per-stage timings, throughput, p50/p95/p99 latency, upstream call
+counts and peak RSS) are printed as JSON, so runs can be compared across
+commits. Needs no token or network. Run from the repository root:
+
+    python -m benchmarks.run_benchmark --output bench_output.json
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.bench_bm25 import QUERIES
+from benchmarks.common import peak_rss_mb, percentile
+
+def measure_import():
+    """Time importing the backend in a fresh interpreter, in ms."""
+    code = "import time; t = time.perf_counter(); import src.backend_config; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return float(output.strip().splitlines()[-1]) * 1000
+
+def timed(fn, *args, **kwargs):
+    """Return (result, elapsed ms)."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+def latency_summary(latencies, elapsed_s):
+    latencies = sorted(latencies)
+    return {
+        "queries": len(latencies),
+        "throughput_qps": round(len(latencies) / elapsed_s, 2) if elapsed_s else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+def replay(backend, workload, concurrency):
+    """Run the workload through generate_response and summarize its latency."""
+    def run(query):
+        start = time.perf_counter()
+        success, response = backend.generate_response(query)
+        if not success:
+            raise RuntimeError(response)
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    if concurrency == 1:
+        latencies = [run(q) for q in workload]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(run, workload))
+    return latency_summary(latencies, time.perf_counter() - start)
+
+def load_workload(args):
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = QUERIES
+    rng = random.Random(args.seed)
+    return [rng.choice(queries) for _ in range(args.workload_size)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdf", default="data/charter_data.pdf")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--queries", help="file with one query per line (default: built-in set)")
+    parser.add_argument("--workload-size", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--embed-call-ms", type=float, default=50.0)
+    parser.add_argument("--embed-text-ms", type=float, default=1.0)
+    parser.add_argument("--llm-first-token-ms", type=float, default=300.0)
+    parser.add_argument("--llm-token-ms", type=float, default=5.0)
+    parser.add_argument("--no-response-cache", action="store_true", help="disable the answer cache during replay")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = {"config": vars(args), "stages": {}}
+    results["stages"]["import"] = {"ms": round(measure_import(), 1)}
+
+    from benchmarks.stubs import StubEmbeddings, StubLLM
+    from src.backend_config import PSUChatBackend
+    from src.embeddings import CachedEmbeddings
+    from src.ingest import ingest_directory
+    from src.retriever import open_vector_store
+
+    workdir = tempfile.mkdtemp(prefix="psu_bench_")
+    try:
+        persist = os.path.join(workdir, "chroma_db")
+        cache_entries = 0 if args.no_response_cache else 512
+
+        def new_stubs():
+            embeddings = CachedEmbeddings(StubEmbeddings(call_latency_ms=args.embed_call_ms,
+                                                         text_latency_ms=args.embed_text_ms))
+            llm = StubLLM(first_token_ms=args.llm_first_token_ms, token_ms=args.llm_token_ms)
+            return embeddings, llm
+
+        def init(label):
+            embeddings, llm = new_stubs()
+            backend = PSUChatBackend(persist, cache_max_entries=cache_entries, persist_response_cache=False)
+            (success, message), ms = timed(backend.initialize_system, args.pdf, llm=llm, embeddings=embeddings)
+            if not success:
+                raise SystemExit(f"{label} failed: {message}")
+            results["stages"][label] = {"ms": round(ms, 1), "chunks": len(backend.chunks),
+                                        "embedding_calls": embeddings.base.calls}
+            return backend, embeddings, llm
+
+        init("cold_init")
+        backend, embeddings, llm = init("warm_init")
+
+        ingest_embeddings, _ = new_stubs()
+        ingest_store = open_vector_store(ingest_embeddings, os.path.join(workdir, "ingest_db"))
+        manifest = os.path.join(workdir, "ingest_db_cache", "ingest_manifest.json")
+        ingest = {}
+        for run in ("first", "rerun"):
+            calls_before = ingest_embeddings.base.calls
+            (_, _, stats), ms = timed(ingest_directory, args.data_dir, ingest_store, manifest)
+            ingest[run] = dict(stats, ms=round(ms, 1), embedding_calls=ingest_embeddings.base.calls - calls_before)
+        results["stages"]["ingest"] = ingest
+
+        workload = load_workload(args)
+        results["stages"]["workload"] = {
+            "sequential": replay(backend, workload, 1),
+            "concurrent": dict(replay(backend, workload, args.concurrency), concurrency=args.concurrency),
+            "llm_calls": llm.calls,
+            "embedding_calls": embeddings.base.calls,
+            "embedding_cache": {"hits": embeddings.hits, "misses": embeddings.misses},
+            "response_cache": backend.response_cache.stats,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Deterministic local stand-ins for the HuggingFace LLM and embedding clients.
+
+They produce stable outputs from a hash of their input and sleep for a
+configurable simulated latency, so the pipeline can be exercised and timed
+without a token or network access.
+"""
+import hashlib
+import threading
+import time
+from typing import Any, Iterator, List, Optional
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForLLMRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+from langchain_core.retrievers import BaseRetriever
+from pydantic import PrivateAttr
+
+def _seed(text):
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+
+class StubEmbeddings(Embeddings):
+    """Hash-seeded unit vectors with simulated per-call and per-text latency."""
+
+    def __init__(self, dimension=768, call_latency_ms=50.0, text_latency_ms=1.0):
+        self.dimension = dimension
+        self.call_latency_ms = call_latency_ms
+        self.text_latency_ms = text_latency_ms
+        self.calls = 0
+        self.texts = 0
+        self._lock = threading.Lock()
+
+    def _vector(self, text):
+        vector = np.random.default_rng(_seed(text)).standard_normal(self.dimension).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            self.calls += 1
+            self.texts += len(texts)
+        time.sleep((self.call_latency_ms + self.text_latency_ms * len(texts)) / 1000)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+class StubLLM(LLM):
+    """Canned answers with simulated prefill (per prompt word), first-token and per-token latency."""
+
+    first_token_ms: float = 200.0
+    token_ms: float = 5.0
+    prompt_token_ms: float = 0.0
+    answer_tokens: int = 64
+    _calls: int = PrivateAttr(default=0)
+    _prompt_chars: int = PrivateAttr(default=0)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    @property
+    def calls(self):
+        return self._calls
+
+    @property
+    def prompt_chars(self):
+        return self._prompt_chars
+
+    def _tokens(self, prompt):
+        rng = np.random.default_rng(_seed(prompt))
+        return [f"word{n}" for n in rng.integers(0, 1000, self.answer_tokens)]
+
+    def _stream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[GenerationChunk]:
+        with self._lock:
+            self._calls += 1
+            self._prompt_chars += len(prompt)
+        time.sleep((self.first_token_ms + self.prompt_token_ms * len(prompt.split())) / 1000)
+        for i, token in enumerate(self._tokens(prompt)):
+            if i:
+                time.sleep(self.token_ms / 1000)
+            chunk = GenerationChunk(text=token + " ")
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        return "".join(chunk.text for chunk in self._stream(prompt, stop, run_manager, **kwargs))
+
+class StubDenseRetriever(BaseRetriever):
+    """Dense retriever stand-in that embeds the query, then picks chunks by hash."""
+
+    embeddings: Any
+    docs: List[Document]
+    k: int = 5
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        vector = np.asarray(self.embeddings.embed_query(query))
+        order = np.argsort(-np.abs(vector))[:self.k]
+        return [self.docs[int(i) % len(self.docs)] for i in order]
+
+class StubReranker:
+    """Cross-encoder stand-in scoring query-term overlap, with simulated per-call and per-pair latency."""
+
+    def __init__(self, call_latency_ms=5.0, pair_latency_ms=2.0):
+        self.call_latency_ms = call_latency_ms
+        self.pair_latency_ms = pair_latency_ms
+        self.calls = 0
+        self.pairs = 0
+        self._lock = threading.Lock()
+
+    def score(self, query, texts):
+        with self._lock:
+            self.calls += 1
+            self.pairs += len(texts)
+        time.sleep((self.call_latency_ms + self.pair_latency_ms * len(texts)) / 1000)
+        terms = set(query.lower().split())
+        return [len(terms & set(text.lower().split())) / max(1, len(terms)) for text in texts]
@@ -1,96 +1,501 @@
-import os
-from dotenv import load_dotenv
-from src.data_processing import load_document, recursive_chunk
-from src.retriever import create_embedding_model, create_vector_store, setup_retrievers
-from src.llm import setup_llm, setup_prompt_template, assemble_chain
-import logging
-
-# Setup basic logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
-
-# Load and set environment variables
-load_dotenv()
-HF_TOKEN = os.getenv("HUGGINGFACEHUB_API_TOKEN")
-
-# Check if token exists
-if not HF_TOKEN:
-    logger.warning("HuggingFace API token not found in environment variables.")
-else:
-    os.environ["HUGGINGFACEHUB_API_TOKEN"] = HF_TOKEN
-
-class PSUChatBackend:
-    def __init__(self, persist_directory="chroma_db"):
-        """Initialize backend with a persistent directory for ChromaDB."""
-        self.chain = None
-        self.persist_directory = persist_directory
-        self.chunks = None
-        self.vector_store = None
-        self.is_initialized = False
-        
-        # Make sure the persist directory exists
-        os.makedirs(self.persist_directory, exist_ok=True)
-
-    def initialize_system(self, pdf_path="data/charter_data.pdf"):
-        """Initialize the entire system, reusing stored embeddings if available."""
-        try:
-            logger.info("Initializing the system...")
-            
-            # Check if token exists
-            if not HF_TOKEN:
-                return False, "HuggingFace API token not found. Please set the HUGGINGFACEHUB_API_TOKEN environment variable."
-            
-            # Create embedding model
-            embeddings = create_embedding_model(HF_TOKEN)
-            
-            # Check if the PDF file exists
-            if not os.path.exists(pdf_path):
-                return False, f"PDF file not found at {pdf_path}"
-
-            # Check if ChromaDB exists; load or create as needed
-            if os.path.exists(self.persist_directory) and os.listdir(self.persist_directory):
-                logger.info("Using existing vector store from %s", self.persist_directory)
-                self.vector_store = create_vector_store([], embeddings, self.persist_directory)
-                
-                # If we're loading a pre-existing vector store, we need to load the document chunks
-                if not self.chunks:
-                    logger.info("Loading document from %s", pdf_path)
-                    data = load_document(pdf_path)
-                    self.chunks = recursive_chunk(data)
-            else:
-                logger.info("Creating new vector store from document at %s", pdf_path)
-                data = load_document(pdf_path)
-                self.chunks = recursive_chunk(data)
-                self.vector_store = create_vector_store(self.chunks, embeddings, self.persist_directory)
-
-            # Setup retrievers - get the ensemble retriever
-            logger.info("Setting up retrievers...")
-            ensemble_retriever = setup_retrievers(self.vector_store, self.chunks)
-
-            # Setup LLM and prompt chain components
-            logger.info("Setting up LLM and prompt chain...")
-            llm = setup_llm()
-            prompt, output_parser = setup_prompt_template()
-            self.chain = assemble_chain(ensemble_retriever, prompt, llm, output_parser)
-            
-            self.is_initialized = True
-            logger.info("System initialized successfully!")
-            return True, "System initialized successfully!"
-        except Exception as e:
-            logger.error("Error during initialization: %s", str(e), exc_info=True)
-            return False, f"Error during initialization: {str(e)}"
-    
-    def generate_response(self, query):
-        """Generate a response for the given query."""
-        if not self.chain:
-            logger.warning("Attempt to generate response with uninitialized system")
-            return False, "System not initialized. Please initialize first."
-        
-        try:
-            logger.info("Generating response for query: %s", query)
-            response = self.chain.invoke(query)
-            logger.info("Response generated successfully")
-            return True, response
-        except Exception as e:
-            logger.error("Error generating response: %s", str(e), exc_info=True)
-            return False, f"Error generating response: {str(e)}"
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from src.data_processing import load_document, recursive_chunk, chunk_store_key, save_chunks, load_chunks
+from src.retriever import create_embedding_model, create_vector_store, open_vector_store, setup_retrievers, check_embedding_dimension
+from src.ingest import ingest_directory, DEFAULT_PERSIST_DIRECTORY as DOCS_PERSIST_DIRECTORY
+from src.bm25_index import BM25Index
+from src.dense_index import DenseIndex, QuantizedDenseIndex
+from src.reranker import CrossEncoderReranker
+from src.cache import ResponseCache
+from src.llm import setup_llm, setup_prompt_template, assemble_chain, count_tokens, load_tokenizer
+from src import metrics
+import logging
+
+# Setup basic logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Load and set environment variables
+load_dotenv()
+HF_TOKEN = os.getenv("HUGGINGFACEHUB_API_TOKEN")
+metrics.configure_from_env()
+
+# Check if token exists
+if not HF_TOKEN:
+    logger.warning("HuggingFace API token not found in environment variables.")
+else:
+    os.environ["HUGGINGFACEHUB_API_TOKEN"] = HF_TOKEN
+
+class PSUChatBackend:
+    def __init__(self, persist_directory="chroma_db", chunk_size=512, chunk_overlap=100,
+                 cache_similarity_threshold=0.95, cache_ttl_seconds=3600, cache_max_entries=512,
+                 persist_response_cache=True, max_context_tokens=1536, dense_backend="chroma",
+                 dense_max_corpus_size=50000, reranker_model=None, rerank_k=10, rerank_top_n=4,
+                 rerank_threshold=None):
+        """Initialize backend with a persistent directory for ChromaDB."""
+        self.chain = None
+        self.persist_directory = persist_directory
+        # Derived artifacts (parsed chunks, indexes) live next to the Chroma directory
+        self.cache_directory = f"{os.path.normpath(persist_directory)}_cache"
+        self.chunk_store_path = os.path.join(self.cache_directory, "chunks.json")
+        self.bm25_index_directory = os.path.join(self.cache_directory, "bm25")
+        self.ingest_manifest_path = os.path.join(self.cache_directory, "ingest_manifest.json")
+        self.dense_index_directory = os.path.join(self.cache_directory, "dense")
+        # "numpy" serves dense search from an exported in-memory matrix, "float16" or "int8" from a
+        # quantized memory-mapped file shared by all workers; both up to dense_max_corpus_size vectors
+        self.dense_backend = dense_backend
+        self.dense_max_corpus_size = dense_max_corpus_size
+        # With a cross-encoder reranker_model, rerank_k candidates per retriever are
+        # reranked down to rerank_top_n chunks (fewer below rerank_threshold)
+        self.reranker_model = reranker_model
+        self.rerank_k = rerank_k
+        self.rerank_top_n = rerank_top_n
+        self.rerank_threshold = rerank_threshold
+        self.response_cache_path = os.path.join(self.cache_directory, "responses.npz") if persist_response_cache else None
+        self.cache_similarity_threshold = cache_similarity_threshold
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.cache_max_entries = cache_max_entries
+        self.max_context_tokens = max_context_tokens
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.chunks = None
+        self.chunk_key = None
+        self.bm25_index = None
+        self.dense_index = None
+        self.vector_store = None
+        self.embeddings = None
+        self.response_cache = None
+        self.callbacks = None
+        self.retriever = None
+        self.reranker = None
+        self.is_initialized = False
+        # Seconds spent in each initialization step, and in the last warmup
+        self.init_timings = {}
+        self.warmup_seconds = None
+        self.warmup_thread = None
+        
+        # Make sure the persist directory exists
+        os.makedirs(self.persist_directory, exist_ok=True)
+
+    def initialize_system(self, pdf_path="data/charter_data.pdf", embedding_backend="api", llm=None, data_dir=None,
+                          embeddings=None, reranker=None):
+        """Initialize the entire system, reusing stored embeddings if available.
+
+        embedding_backend selects "api" (HuggingFace Inference API) or "local"
+        (in-process sentence-transformers); an existing collection is reused
+        by either as long as the embedding dimensions match. An llm can be
+        passed in place of the HuggingFace endpoint and an embeddings object in
+        place of embedding_backend, e.g. local stand-ins for tests; the API
+        token is only required for the remote clients actually used. A
+        reranker can likewise be passed in place of loading reranker_model.
+        When data_dir is given, every PDF in it is ingested incrementally
+        instead of the single pdf_path.
+
+        The LLM client and prompt are set up, and the BM25 and dense indexes
+        loaded, on a small thread pool alongside the vector store.
+        """
+        pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="init")
+        try:
+            logger.info("Initializing the system...")
+            start = time.perf_counter()
+            self.init_timings = {}
+            
+            # Check if token exists
+            needs_token = llm is None or (embeddings is None and embedding_backend == "api")
+            if needs_token and not HF_TOKEN:
+                return False, "HuggingFace API token not found. Please set the HUGGINGFACEHUB_API_TOKEN environment variable."
+            
+            # Check if the PDF file exists
+            if not data_dir and not os.path.exists(pdf_path):
+                return False, f"PDF file not found at {pdf_path}"
+
+            # Setup LLM and prompt chain components while the indexes load
+            llm_future = pool.submit(self._timed, "llm", lambda: llm or setup_llm())
+            prompt_future = pool.submit(self._timed, "prompt", setup_prompt_template)
+            reranker_future = None
+            if reranker is None and self.reranker_model:
+                reranker_future = pool.submit(self._timed, "reranker", CrossEncoderReranker, self.reranker_model)
+            if self.max_context_tokens is not None or metrics.enabled():
+                # Not waited on: token counts use the regex estimate until it has loaded
+                pool.submit(load_tokenizer)
+
+            # Create embedding model
+            if embeddings is None:
+                embeddings = self._timed("embeddings", create_embedding_model, HF_TOKEN, backend=embedding_backend)
+            else:
+                embedding_backend = type(embeddings).__name__
+            self.embeddings = embeddings
+
+            # Check if ChromaDB exists; load or create as needed
+            vector_store_start = time.perf_counter()
+            rebuilt = False
+            if data_dir:
+                logger.info("Syncing vector store with documents in %s", data_dir)
+                self.vector_store = open_vector_store(embeddings, self.persist_directory)
+                check_embedding_dimension(self.vector_store, embeddings)
+                self.chunks, self.chunk_key, stats = ingest_directory(
+                    data_dir, self.vector_store, self.ingest_manifest_path, self.chunk_size, self.chunk_overlap
+                )
+                rebuilt = bool(stats["added"] or stats["deleted"])
+            elif os.path.exists(self.persist_directory) and os.listdir(self.persist_directory):
+                logger.info("Using existing vector store from %s", self.persist_directory)
+                # If we're loading a pre-existing vector store, we need to load the document chunks
+                chunks_future = None
+                if not self.chunks:
+                    chunks_future = pool.submit(self._timed, "chunks", self._load_chunks, pdf_path)
+                self.vector_store = create_vector_store([], embeddings, self.persist_directory)
+                check_embedding_dimension(self.vector_store, embeddings)
+                if chunks_future is not None:
+                    self.chunks = chunks_future.result()
+            else:
+                logger.info("Creating new vector store from document at %s", pdf_path)
+                self.chunks = self._load_chunks(pdf_path)
+                self.vector_store = create_vector_store(self.chunks, embeddings, self.persist_directory)
+                rebuilt = True
+            self.init_timings["vector_store"] = time.perf_counter() - vector_store_start
+
+            # Memory-map the compiled BM25 index, building it only when the chunks changed
+            bm25_future = pool.submit(self._timed, "bm25_index", self._load_bm25_index)
+            # Export the collection to an in-memory matrix when the NumPy dense backend is selected
+            dense_future = pool.submit(
+                self._timed, "dense_index", self._load_dense_index, f"{self.chunk_key}:{embedding_backend}", rebuilt
+            )
+
+            # Answers are only valid for the index they were generated against
+            self.response_cache = ResponseCache(
+                embeddings,
+                similarity_threshold=self.cache_similarity_threshold,
+                max_entries=self.cache_max_entries,
+                ttl_seconds=self.cache_ttl_seconds,
+                persist_path=self.response_cache_path,
+                fingerprint=f"{self.chunk_key}:{embedding_backend}",
+            )
+            if rebuilt:
+                self.response_cache.clear()
+
+            # Setup retrievers - get the ensemble retriever
+            logger.info("Setting up retrievers...")
+            self.bm25_index = bm25_future.result()
+            self.dense_index = dense_future.result()
+            self.reranker = reranker_future.result() if reranker_future is not None else reranker
+            self.retriever = setup_retrievers(
+                self.vector_store, self.chunks, self.bm25_index, dense_index=self.dense_index,
+                reranker=self.reranker, rerank_k=self.rerank_k, rerank_top_n=self.rerank_top_n,
+                rerank_threshold=self.rerank_threshold,
+            )
+
+            logger.info("Setting up LLM and prompt chain...")
+            prompt, output_parser = prompt_future.result()
+            self.chain = assemble_chain(self.retriever, prompt, llm_future.result(), output_parser,
+                                        self.max_context_tokens)
+            self._setup_metrics()
+            
+            self.is_initialized = True
+            self.init_timings["total"] = time.perf_counter() - start
+            logger.info("System initialized successfully in %.2fs (%s)", self.init_timings["total"],
+                        ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.init_timings.items()))
+            return True, "System initialized successfully!"
+        except Exception as e:
+            logger.error("Error during initialization: %s", str(e), exc_info=True)
+            return False, f"Error during initialization: {str(e)}"
+        finally:
+            pool.shutdown(wait=False)
+
+    def close(self):
+        """Release the vector store client and the loaded indexes.
+
+        The backend must be initialized again before it can answer queries.
+        """
+        client = getattr(self.vector_store, "_client", None)
+        if client is not None and hasattr(client, "close"):
+            # Chroma keeps one system per persist directory alive until its clients close
+            client.close()
+        self.chain = None
+        self.retriever = None
+        self.vector_store = None
+        self.bm25_index = None
+        self.dense_index = None
+        self.chunks = None
+        if self.response_cache is not None:
+            self.response_cache.close()
+        self.response_cache = None
+        self.is_initialized = False
+
+    def _timed(self, name, fn, *args, **kwargs):
+        """Call fn, recording its duration under name in init_timings."""
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.init_timings[name] = time.perf_counter() - start
+
+    def warmup(self, queries):
+        """Prime the caches and lazily loaded pieces with representative queries.
+
+        Embeds the queries in one batch (filling the query-embedding cache),
+        runs them through the retriever (loading Chroma's HNSW index and the
+        BM25 pages) and loads the tokenizer, without calling the LLM.
+        """
+        if not self.retriever:
+            return
+        start = time.perf_counter()
+        try:
+            if hasattr(self.embeddings, "embed_queries"):
+                self.embeddings.embed_queries(queries)
+            self.retriever.batch(queries)
+            if self.max_context_tokens is not None:
+                load_tokenizer()
+        except Exception as e:
+            logger.warning("Warmup failed: %s", str(e))
+            return
+        self.warmup_seconds = time.perf_counter() - start
+        logger.info("Warmed up with %d queries in %.2fs", len(queries), self.warmup_seconds)
+
+    def start_warmup(self, queries):
+        """Run warmup in a background thread so the UI can serve while it runs."""
+        self.warmup_thread = threading.Thread(target=self.warmup, args=(list(queries),), name="warmup", daemon=True)
+        self.warmup_thread.start()
+        return self.warmup_thread
+    
+    def _load_chunks(self, pdf_path):
+        """Load chunks from the chunk store, parsing the PDF only when the store is stale."""
+        key = chunk_store_key(pdf_path, self.chunk_size, self.chunk_overlap)
+        self.chunk_key = key
+        chunks = load_chunks(self.chunk_store_path, key)
+        if chunks is not None:
+            logger.info("Loaded %d chunks from chunk store %s", len(chunks), self.chunk_store_path)
+            return chunks
+
+        logger.info("Loading document from %s", pdf_path)
+        data = load_document(pdf_path)
+        chunks = recursive_chunk(data, self.chunk_size, self.chunk_overlap)
+        save_chunks(chunks, self.chunk_store_path, key)
+        logger.info("Saved %d chunks to chunk store %s", len(chunks), self.chunk_store_path)
+        return chunks
+
+    def _load_dense_index(self, fingerprint, rebuilt=False):
+        """Load or export the in-memory dense index, or return None to search through Chroma."""
+        if self.dense_backend == "chroma":
+            return None
+        count = self.vector_store._collection.count()
+        if count > self.dense_max_corpus_size:
+            logger.info("Collection has %d vectors (> %d); using Chroma for dense search",
+                        count, self.dense_max_corpus_size)
+            return None
+        key = f"{fingerprint}:{count}"
+        if self.dense_backend == "numpy":
+            index_class, index_dir, options = DenseIndex, self.dense_index_directory, {}
+        else:
+            index_class = QuantizedDenseIndex
+            index_dir = f"{self.dense_index_directory}_{self.dense_backend}"
+            options = {"dtype": self.dense_backend}
+        index = None if rebuilt else index_class.load(index_dir, key)
+        if index is not None:
+            logger.info("Loaded dense index from %s", index_dir)
+            return index
+        logger.info("Exporting %d vectors to dense index in %s", count, index_dir)
+        return index_class.export(self.vector_store, index_dir, key, **options)
+
+    def _setup_metrics(self):
+        """Attach the metrics callback handler and cache gauges when metrics are enabled."""
+        if not metrics.enabled():
+            self.callbacks = None
+            return
+        self.callbacks = [metrics.MetricsCallbackHandler(count_tokens)]
+        response_cache = self.response_cache
+        metrics.register_gauge("psu_response_cache_hit_ratio", lambda: response_cache.stats["hit_rate"])
+        embeddings = self.embeddings
+        if hasattr(embeddings, "hits"):
+            metrics.register_gauge(
+                "psu_embedding_cache_hit_ratio",
+                lambda: embeddings.hits / max(1, embeddings.hits + embeddings.misses),
+            )
+
+    def _run_config(self):
+        """Return the runnable config for chain calls (callbacks only when metrics are on)."""
+        return {"callbacks": self.callbacks} if self.callbacks else None
+
+    def _load_bm25_index(self):
+        """Memory-map the compiled BM25 index for the current chunks, building it if stale."""
+        index = BM25Index.load(self.bm25_index_directory, self.chunk_key)
+        if index is not None:
+            logger.info("Loaded BM25 index from %s", self.bm25_index_directory)
+            return index
+        logger.info("Building BM25 index in %s", self.bm25_index_directory)
+        return BM25Index.build(self.chunks, self.bm25_index_directory, self.chunk_key)
+
+    def generate_response(self, query):
+        """Generate a response for the given query."""
+        if not self.chain:
+            logger.warning("Attempt to generate response with uninitialized system")
+            return False, "System not initialized. Please initialize first."
+        
+        try:
+            logger.info("Generating response for query: %s", query)
+            start = time.perf_counter()
+            cached = self._cached_response(query)
+            if cached is not None:
+                metrics.observe("psu_response_seconds", time.perf_counter() - start, path="cached")
+                return True, cached
+            response = self.chain.invoke(query, config=self._run_config())
+            metrics.observe("psu_response_seconds", time.perf_counter() - start, path="invoke")
+            logger.info("Response generated successfully in %.3fs", time.perf_counter() - start)
+            self._cache_response(query, response)
+            return True, response
+        except Exception as e:
+            logger.error("Error generating response: %s", str(e), exc_info=True)
+            return False, f"Error generating response: {str(e)}"
+
+    def stream_response(self, query):
+        """Yield the response for the given query chunk by chunk as the LLM generates it.
+
+        Raises RuntimeError if the system is not initialized; errors from the
+        chain are logged and re-raised to the caller.
+        """
+        if not self.chain:
+            logger.warning("Attempt to stream response with uninitialized system")
+            raise RuntimeError("System not initialized. Please initialize first.")
+
+        logger.info("Streaming response for query: %s", query)
+        start = time.perf_counter()
+        cached = self._cached_response(query)
+        if cached is not None:
+            metrics.observe("psu_response_seconds", time.perf_counter() - start, path="cached")
+            yield cached
+            return
+
+        time_to_first_token = None
+        chunks = []
+        try:
+            for chunk in self.chain.stream(query, config=self._run_config()):
+                if time_to_first_token is None:
+                    time_to_first_token = time.perf_counter() - start
+                    metrics.observe("psu_time_to_first_token_seconds", time_to_first_token)
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            logger.error("Error streaming response: %s", str(e), exc_info=True)
+            raise
+        metrics.observe("psu_response_seconds", time.perf_counter() - start, path="stream")
+        self._cache_response(query, "".join(chunks))
+        logger.info(
+            "Response streamed successfully (time to first token %.3fs, total %.3fs)",
+            time_to_first_token if time_to_first_token is not None else 0.0,
+            time.perf_counter() - start,
+        )
+
+    async def agenerate_responses(self, queries):
+        """Generate responses for a batch of queries.
+
+        Query embeddings go out as one batch, cached answers are served
+        directly and the remaining queries run through the chain's abatch.
+        Returns a list of (success, response) tuples in query order.
+        """
+        if not self.chain:
+            logger.warning("Attempt to generate responses with uninitialized system")
+            return [(False, "System not initialized. Please initialize first.")] * len(queries)
+
+        logger.info("Generating responses for a batch of %d queries", len(queries))
+        if hasattr(self.embeddings, "embed_queries"):
+            try:
+                await asyncio.to_thread(self.embeddings.embed_queries, queries)
+            except Exception as e:
+                logger.warning("Batched query embedding failed: %s", str(e))
+
+        # Cache lookups and puts take the cache lock and may embed, so they run off the event loop
+        cached_responses = await asyncio.to_thread(self._cached_responses, queries)
+        results = [None] * len(queries)
+        pending = []
+        for i, cached in enumerate(cached_responses):
+            if cached is not None:
+                results[i] = (True, cached)
+            else:
+                pending.append(i)
+
+        if pending:
+            responses = await self.chain.abatch(
+                [queries[i] for i in pending], config=self._run_config(), return_exceptions=True
+            )
+            generated = []
+            for i, response in zip(pending, responses):
+                if isinstance(response, Exception):
+                    logger.error("Error generating response: %s", str(response))
+                    results[i] = (False, f"Error generating response: {str(response)}")
+                else:
+                    generated.append((queries[i], response))
+                    results[i] = (True, response)
+            await asyncio.to_thread(self._cache_responses, generated)
+        return results
+
+    def _cached_responses(self, queries):
+        return [self._cached_response(query) for query in queries]
+
+    def _cache_responses(self, generated):
+        for query, response in generated:
+            self._cache_response(query, response)
+
+    def _cached_response(self, query):
+        """Return a cached answer for the query, or None on a miss or cache failure."""
+        if self.response_cache is None:
+            return None
+        try:
+            response = self.response_cache.get(query)
+        except Exception as e:
+            logger.warning("Response cache lookup failed: %s", str(e))
+            return None
+        metrics.inc("psu_response_cache_lookups_total", result="hit" if response is not None else "miss")
+        if response is not None:
+            logger.info("Serving cached response (%s)", self.response_cache.stats)
+        return response
+
+    def _cache_response(self, query, response):
+        """Store a generated answer, never letting a cache failure break the response.
+
+        Empty answers (e.g. a stream that yielded nothing) are not cached, so
+        they are not served again for the whole TTL.
+        """
+        if self.response_cache is None or not response or not response.strip():
+            return
+        try:
+            self.response_cache.put(query, response)
+        except Exception as e:
+            logger.warning("Response cache store failed: %s", str(e))
+
+# Process-wide backend shared by every Streamlit session
+_shared_backend = None
+_shared_backend_lock = threading.Lock()
+
+def get_shared_backend(persist_directory=None, pdf_path="data/charter_data.pdf",
+                       embedding_backend=os.getenv("EMBEDDING_BACKEND", "api"), data_dir=os.getenv("DATA_DIR"),
+                       dense_backend=os.getenv("DENSE_BACKEND", "chroma"), reranker_model=os.getenv("RERANKER_MODEL"),
+                       warmup_queries=None):
+    """Return the process-wide backend, initializing it once on first use.
+
+    Concurrent first callers block on the same lock and reuse the single
+    initialization instead of racing; a failed initialization is retried by
+    the next caller. After a successful initialization, warmup_queries are
+    run through warmup in the background. Without a persist_directory, the
+    single PDF is served from chroma_db and a data_dir from chroma_db_docs.
+    Returns (backend, success, message).
+    """
+    global _shared_backend
+    backend = _shared_backend
+    if backend is not None and backend.is_initialized:
+        return backend, True, "System initialized successfully!"
+
+    with _shared_backend_lock:
+        if _shared_backend is not None and _shared_backend.is_initialized:
+            return _shared_backend, True, "System initialized successfully!"
+        if persist_directory is None:
+            persist_directory = DOCS_PERSIST_DIRECTORY if data_dir else "chroma_db"
+        backend = PSUChatBackend(persist_directory, dense_backend=dense_backend, reranker_model=reranker_model)
+        success, message = backend.initialize_system(pdf_path, embedding_backend, data_dir=data_dir)
+        if success:
+            _shared_backend = backend
+            if warmup_queries:
+                backend.start_warmup(warmup_queries)
+        return backend, success, message
@@ -0,0 +1,186 @@
+import os
+import json
+import math
+import shutil
+import hashlib
+from typing import Any, List
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+# Bump whenever the on-disk layout or scoring changes
+BM25_INDEX_VERSION = 2
+
+def default_tokenize(text):
+    """Tokenize text the same way langchain's BM25Retriever does by default."""
+    return text.split()
+
+def _version_dir(index_dir, key):
+    """Return the subdirectory of index_dir holding the index for key.
+
+    Each key gets its own directory, so rebuilding for new chunks never
+    touches the files that other workers still have memory-mapped.
+    """
+    digest = hashlib.sha256(f"{BM25_INDEX_VERSION}:{key}".encode("utf-8")).hexdigest()[:16]
+    return os.path.join(index_dir, digest)
+
+class BM25Index:
+    """Compiled BM25 inverted index backed by memory-mapped NumPy arrays.
+
+    Postings are stored CSR-style: ``offsets[t]:offsets[t + 1]`` slices ``postings``
+    (document ids) and ``weights`` (the precomputed BM25 contribution of term ``t``
+    to each document). Scoring mirrors rank_bm25's BM25Okapi exactly.
+    """
+
+    def __init__(self, vocab, offsets, postings, weights, n_docs):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.postings = postings
+        self.weights = weights
+        self.n_docs = n_docs
+
+    @classmethod
+    def build(cls, chunks, index_dir, key, k1=1.5, b=0.75, epsilon=0.25):
+        """Tokenize chunks once, write the compiled index to disk and return it memory-mapped."""
+        corpus = [default_tokenize(c.page_content) for c in chunks]
+        n_docs = len(corpus)
+
+        # Term frequencies per document and document frequencies, in first-seen order
+        doc_freqs = []
+        nd = {}
+        for document in corpus:
+            frequencies = {}
+            for word in document:
+                frequencies[word] = frequencies.get(word, 0) + 1
+            doc_freqs.append(frequencies)
+            for word in frequencies:
+                nd[word] = nd.get(word, 0) + 1
+
+        # Okapi IDF with negative values floored to epsilon * average IDF
+        idf = {}
+        idf_sum = 0
+        negative_idfs = []
+        for word, freq in nd.items():
+            value = math.log(n_docs - freq + 0.5) - math.log(freq + 0.5)
+            idf[word] = value
+            idf_sum += value
+            if value < 0:
+                negative_idfs.append(word)
+        eps = epsilon * (idf_sum / len(idf)) if idf else 0.0
+        for word in negative_idfs:
+            idf[word] = eps
+
+        doc_len = np.array([len(d) for d in corpus], dtype=np.float64)
+        avgdl = sum(len(d) for d in corpus) / n_docs if n_docs else 0.0
+        length_norm = k1 * (1 - b + b * doc_len / avgdl) if n_docs else doc_len
+
+        terms = list(nd)
+        term_ids = {term: i for i, term in enumerate(terms)}
+        postings_per_term = [[] for _ in terms]
+        for doc_id, frequencies in enumerate(doc_freqs):
+            for word, tf in frequencies.items():
+                postings_per_term[term_ids[word]].append((doc_id, tf))
+
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        postings = np.empty(sum(nd.values()), dtype=np.int32)
+        weights = np.empty(len(postings), dtype=np.float64)
+        pos = 0
+        for term_id, entries in enumerate(postings_per_term):
+            ids = np.array([doc_id for doc_id, _ in entries], dtype=np.int32)
+            tf = np.array([tf for _, tf in entries], dtype=np.float64)
+            end = pos + len(entries)
+            postings[pos:end] = ids
+            weights[pos:end] = idf[terms[term_id]] * (tf * (k1 + 1) / (tf + length_norm[ids]))
+            offsets[term_id + 1] = end
+            pos = end
+
+        # Write into a private directory and rename it into place, so readers
+        # only ever see complete indexes and mapped files are never overwritten
+        target = _version_dir(index_dir, key)
+        tmp_dir = f"{target}.tmp{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        np.save(os.path.join(tmp_dir, "offsets.npy"), offsets)
+        np.save(os.path.join(tmp_dir, "postings.npy"), postings)
+        np.save(os.path.join(tmp_dir, "weights.npy"), weights)
+        with open(os.path.join(tmp_dir, "vocab.json"), "w", encoding="utf-8") as f:
+            json.dump(terms, f)
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": BM25_INDEX_VERSION, "key": key, "n_docs": n_docs, "k1": k1, "b": b}, f)
+        try:
+            os.replace(tmp_dir, target)
+        except OSError:
+            # Another worker finished the same index first; keep theirs
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        cls._remove_stale(index_dir, target)
+
+        return cls.load(index_dir, key)
+
+    @staticmethod
+    def _remove_stale(index_dir, current):
+        """Delete indexes built for other keys.
+
+        Workers that still map them keep reading the unlinked files; where the
+        platform refuses to delete mapped files they are left for a later build.
+        """
+        for name in os.listdir(index_dir):
+            path = os.path.join(index_dir, name)
+            if path != current and os.path.isdir(path) and ".tmp" not in name:
+                shutil.rmtree(path, ignore_errors=True)
+        for name in ("offsets.npy", "postings.npy", "weights.npy", "vocab.json", "meta.json"):
+            # Files of the version 1 layout, written directly into index_dir
+            try:
+                os.remove(os.path.join(index_dir, name))
+            except OSError:
+                pass
+
+    @classmethod
+    def load(cls, index_dir, key):
+        """Memory-map a compiled index, or return None if it is missing or stale."""
+        index_dir = _version_dir(index_dir, key)
+        meta_path = os.path.join(index_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != BM25_INDEX_VERSION or meta.get("key") != key:
+                return None
+            with open(os.path.join(index_dir, "vocab.json"), "r", encoding="utf-8") as f:
+                terms = json.load(f)
+            # mmap_mode="r" lets every worker process share the same page-cache pages
+            offsets = np.load(os.path.join(index_dir, "offsets.npy"), mmap_mode="r")
+            postings = np.load(os.path.join(index_dir, "postings.npy"), mmap_mode="r")
+            weights = np.load(os.path.join(index_dir, "weights.npy"), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        vocab = {term: i for i, term in enumerate(terms)}
+        return cls(vocab, offsets, postings, weights, meta["n_docs"])
+
+    def get_scores(self, tokens):
+        """Return BM25 scores of every document for the tokenized query."""
+        term_ids = [self.vocab[t] for t in tokens if t in self.vocab]
+        if not term_ids:
+            return np.zeros(self.n_docs, dtype=np.float64)
+        slices = [slice(self.offsets[t], self.offsets[t + 1]) for t in term_ids]
+        doc_ids = np.concatenate([self.postings[s] for s in slices])
+        contributions = np.concatenate([self.weights[s] for s in slices])
+        return np.bincount(doc_ids, weights=contributions, minlength=self.n_docs)
+
+    def top_k(self, tokens, k):
+        """Return indices of the k best documents, ordered like rank_bm25's get_top_n."""
+        scores = self.get_scores(tokens)
+        return np.argsort(scores)[::-1][:k]
+
+class BM25IndexRetriever(BaseRetriever):
+    """Retriever that scores queries against a compiled BM25Index."""
+
+    index: Any
+    docs: List[Document]
+    k: int = 4
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return [self.docs[i] for i in self.index.top_k(default_tokenize(query), self.k)]
@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import atexit
+import weakref
+import threading
+from collections import OrderedDict
+import numpy as np
+from src.embeddings import normalize_query
+
+# Caches with unsaved entries are flushed when the process exits
+_persistent_caches = weakref.WeakSet()
+
+@atexit.register
+def _flush_all():
+    for cache in list(_persistent_caches):
+        cache.flush()
+
+class ResponseCache:
+    """Two-tier cache of generated answers.
+
+    The exact tier matches on normalized query text. On an exact miss, the
+    semantic tier embeds the query and reuses the answer of the most similar
+    cached query if its cosine similarity reaches ``similarity_threshold``.
+    Entries expire after ``ttl_seconds`` and the least recently used entry is
+    evicted beyond ``max_entries``. When ``persist_path`` is set the cache is
+    saved to disk and only reloaded if its ``fingerprint`` (the index it was
+    built against) still matches. Saves happen on a background thread at most
+    every ``save_interval`` seconds, outside the lock, as one .npz file holding
+    the embeddings as a float32 matrix and a small JSON index of the entries.
+    """
+
+    def __init__(self, embeddings=None, similarity_threshold=0.95, max_entries=512,
+                 ttl_seconds=3600, persist_path=None, fingerprint=None, save_interval=5.0):
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path
+        self.fingerprint = fingerprint
+        self.save_interval = save_interval
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # normalized query -> (response, unit embedding or None, created)
+        self._matrix = None
+        self._matrix_keys = []
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._closed = False
+        self._wake = threading.Event()
+        self._writer = None
+        self._load()
+        if self.persist_path:
+            _persistent_caches.add(self)
+
+    @property
+    def stats(self):
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            return {
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+    def _expired(self, created):
+        return self.ttl_seconds is not None and time.time() - created > self.ttl_seconds
+
+    def _embed(self, query):
+        vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _semantic_matrix(self):
+        """Return the stacked embeddings of cached entries, rebuilding it after changes."""
+        if self._matrix is None:
+            self._matrix_keys = [k for k, (_, vector, _) in self._entries.items() if vector is not None]
+            vectors = [self._entries[k][1] for k in self._matrix_keys]
+            self._matrix = np.stack(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+        return self._matrix
+
+    def get(self, query):
+        """Return a cached response for the query, or None on a miss."""
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry[2]):
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry[0]
+
+        if self.embeddings is not None:
+            vector = self._embed(query)
+            with self._lock:
+                matrix = self._semantic_matrix()
+                if len(matrix):
+                    similarities = matrix @ vector
+                    candidates = np.flatnonzero(similarities >= self.similarity_threshold)
+                    expired = []
+                    match = None
+                    # Most similar first; an expired entry is evicted and the next one tried
+                    for row in candidates[np.argsort(-similarities[candidates], kind="stable")]:
+                        key = self._matrix_keys[row]
+                        entry = self._entries.get(key)
+                        if entry is None:
+                            continue
+                        if self._expired(entry[2]):
+                            expired.append(key)
+                            continue
+                        match = entry
+                        self._entries.move_to_end(key)
+                        self.semantic_hits += 1
+                        break
+                    if expired:
+                        for key in expired:
+                            del self._entries[key]
+                        self._matrix = None
+                        self._schedule_save()
+                    if match is not None:
+                        return match[0]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, query, response):
+        """Cache a response for the query, evicting expired and least recently used entries."""
+        key = normalize_query(query)
+        vector = self._embed(query) if self.embeddings is not None else None
+        with self._lock:
+            self._entries[key] = (response, vector, time.time())
+            self._entries.move_to_end(key)
+            for stale in [k for k, (_, _, created) in self._entries.items() if self._expired(created)]:
+                del self._entries[stale]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+            self._schedule_save()
+
+    def clear(self, fingerprint=None):
+        """Drop every entry, e.g. after the vector store was rebuilt."""
+        with self._lock:
+            if fingerprint is not None:
+                self.fingerprint = fingerprint
+            self._entries.clear()
+            self._matrix = None
+            self._schedule_save()
+
+    def _schedule_save(self):
+        """Mark the cache dirty and wake the background writer. Holds _lock."""
+        if not self.persist_path or self._closed:
+            return
+        self._dirty = True
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="response-cache-writer", daemon=True)
+            self._writer.start()
+        self._wake.set()
+
+    def _write_loop(self):
+        while True:
+            self._wake.wait()
+            if self._closed:
+                return
+            # Coalesce the puts of the next save_interval seconds into one write
+            time.sleep(self.save_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # A failed save must not stop later ones; the entries stay dirty
+                with self._lock:
+                    self._dirty = True
+
+    def flush(self):
+        """Write unsaved entries to persist_path now."""
+        if not self.persist_path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                self._dirty = False
+                entries = list(self._entries.items())
+                fingerprint = self.fingerprint
+            self._write(entries, fingerprint)
+
+    def close(self):
+        """Stop the background writer and save any unsaved entries."""
+        with self._lock:
+            self._closed = True
+        self._wake.set()
+        self.flush()
+
+    def _write(self, entries, fingerprint):
+        vectors = [vector for _, (_, vector, _) in entries if vector is not None]
+        matrix = np.stack(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+        index = []
+        row = 0
+        for key, (response, vector, created) in entries:
+            index.append({"query": key, "response": response, "created": created,
+                          "row": row if vector is not None else None})
+            row += vector is not None
+        payload = json.dumps({"fingerprint": fingerprint, "entries": index}).encode("utf-8")
+        os.makedirs(os.path.dirname(self.persist_path) or ".", exist_ok=True)
+        # Every process writes its own temporary file before the atomic rename
+        tmp_path = f"{self.persist_path}.tmp{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, vectors=matrix, index=np.frombuffer(payload, dtype=np.uint8))
+        os.replace(tmp_path, self.persist_path)
+
+    def _load(self):
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with np.load(self.persist_path, allow_pickle=False) as data:
+                payload = json.loads(data["index"].tobytes().decode("utf-8"))
+                matrix = data["vectors"]
+        except (OSError, ValueError, KeyError):
+            return
+        if payload.get("fingerprint") != self.fingerprint:
+            return
+        for entry in payload.get("entries", []):
+            if self._expired(entry["created"]):
+                continue
+            vector = matrix[entry["row"]] if entry.get("row") is not None else None
+            self._entries[entry["query"]] = (entry["response"], vector, entry["created"])
@@ -0,0 +1,150 @@
+"""Bounded chat history for the Streamlit app.
+
+Each session keeps at most max_messages messages in memory; older ones are
+spilled to a SQLite log. The app renders only the most recent window of
+messages, and "load earlier" widens the window a page at a time, reading
+spilled messages back from the log. Past messages never change, so their
+rendered HTML is built once and reused on every rerun.
+
+By default each session's log is its own temporary file, deleted by close()
+or when the session's ChatHistory is garbage collected (Streamlit drops a
+session's state when the session ends), so no conversation outlives it.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import weakref
+from collections import deque
+
+def _discard(db, db_path, session_id, owns_file):
+    """Delete a session's spilled messages: its whole file if it owns one, else its rows."""
+    if owns_file:
+        db.close()
+        try:
+            os.remove(db_path)
+        except OSError:
+            pass
+    else:
+        db.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+        db.commit()
+        db.close()
+
+class ChatHistory:
+    """Capped, windowed chat history for one session.
+
+    Messages are dicts with "id", "role" and "content" keys. When db_path
+    is given, sessions share that file and each removes its own rows on
+    close.
+    """
+
+    def __init__(self, session_id, db_path=None, max_messages=50, window_size=20, page_size=20):
+        self.session_id = session_id
+        self.db_path = db_path
+        self._owns_file = db_path is None
+        self.max_messages = max_messages
+        self.page_size = page_size
+        self.window_size = window_size
+        self._messages = deque()
+        self._next_id = 0
+        self._spilled = 0
+        self._html = {}
+        self._db = None
+        self._finalizer = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._next_id
+
+    def _connection(self):
+        if self._db is None:
+            if self._owns_file:
+                fd, self.db_path = tempfile.mkstemp(prefix="psu_chat_", suffix=".sqlite3")
+                os.close(fd)
+            # Streamlit reruns a session's script on different threads
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS messages "
+                "(session_id TEXT, id INTEGER, role TEXT, content TEXT, PRIMARY KEY (session_id, id))"
+            )
+            # Also runs at interpreter exit
+            self._finalizer = weakref.finalize(self, _discard, self._db, self.db_path, self.session_id,
+                                               self._owns_file)
+        return self._db
+
+    def append(self, role, content):
+        """Add a message, spilling the oldest in-memory message to the log when over the cap."""
+        with self._lock:
+            message = {"id": self._next_id, "role": role, "content": content}
+            self._next_id += 1
+            self._messages.append(message)
+            if len(self._messages) > self.max_messages:
+                oldest = self._messages.popleft()
+                db = self._connection()
+                db.execute("INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?)",
+                           (self.session_id, oldest["id"], oldest["role"], oldest["content"]))
+                db.commit()
+                self._spilled += 1
+            return message
+
+    def has_earlier(self):
+        """Return True if older messages exist beyond the rendered window."""
+        return self._next_id > self.window_size
+
+    def load_earlier(self):
+        """Widen the rendered window by one page."""
+        self.window_size = min(self._next_id, self.window_size + self.page_size)
+
+    def window(self):
+        """Return the messages in the rendered window, oldest first."""
+        with self._lock:
+            start = max(0, self._next_id - self.window_size)
+            in_memory = [m for m in self._messages if m["id"] >= start]
+            if start >= self._spilled:
+                return in_memory
+            rows = self._connection().execute(
+                "SELECT id, role, content FROM messages WHERE session_id = ? AND id >= ? AND id < ? ORDER BY id",
+                (self.session_id, start, self._spilled),
+            ).fetchall()
+            return [{"id": id, "role": role, "content": content} for id, role, content in rows] + in_memory
+
+    def html(self, message):
+        """Return the message's HTML; only the newest message is marked as the last one.
+
+        The newest message is rebuilt each time, as its class changes once the
+        next message arrives; past messages are rendered once and cached by id.
+        """
+        if message["id"] == self._next_id - 1:
+            return f'<div class="last-message">{message["content"]}</div>'
+        html = self._html.get(message["id"])
+        if html is None:
+            html = self._html[message["id"]] = f'<div class="">{message["content"]}</div>'
+            # Bound the cache to roughly what can be on screen
+            while len(self._html) > self.window_size + self.max_messages:
+                del self._html[min(self._html)]
+        return html
+
+    def clear(self):
+        """Drop every message of this session, including spilled ones."""
+        with self._lock:
+            self._messages.clear()
+            self._html.clear()
+            self._next_id = 0
+            self._spilled = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM messages WHERE session_id = ?", (self.session_id,))
+                self._db.commit()
+
+    def close(self):
+        """Delete this session's spilled messages; the history is empty afterwards."""
+        with self._lock:
+            self._messages.clear()
+            self._html.clear()
+            self._next_id = 0
+            self._spilled = 0
+            if self._finalizer is not None:
+                self._finalizer()
+            self._db = None
+            self._finalizer = None
+            if self._owns_file:
+                self.db_path = None
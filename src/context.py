@@ -0,0 +1,114 @@
+"""Assemble retrieved chunks into a compact, token-budgeted prompt context.
+
+The hybrid retriever can return up to 2 * k chunks, and with chunk_overlap
+neighbouring chunks repeat text. pack_context removes duplicates, stitches
+overlapping or adjacent chunks back into single spans, keeps the fused
+ranking order and stops at a token budget.
+"""
+from src import metrics
+
+# Shortest shared suffix/prefix treated as real chunk overlap when no offsets are known
+MIN_TEXT_OVERLAP = 20
+
+def _dedupe_key(doc):
+    metadata = doc.metadata
+    if "chunk_id" in metadata:
+        return ("id", metadata["chunk_id"])
+    if "start_index" in metadata:
+        return ("offset", metadata.get("source"), metadata.get("page"), metadata["start_index"])
+    return ("text", doc.page_content)
+
+def _text_overlap(left, right, max_overlap):
+    """Return the length of the longest suffix of left that is a prefix of right."""
+    for size in range(min(len(left), len(right), max_overlap), MIN_TEXT_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+def merge_spans(docs, max_overlap=200):
+    """Dedupe documents and merge overlapping or adjacent chunks.
+
+    Returns (text, rank) spans where rank is the best fused rank of any chunk
+    in the span. Chunks with a start_index from the same source and page are
+    merged by offset; others are merged when one's tail repeats the next's head.
+    """
+    seen = set()
+    unique = []
+    for rank, doc in enumerate(docs):
+        key = _dedupe_key(doc)
+        if key in seen or doc.page_content in seen:
+            continue
+        seen.add(key)
+        seen.add(doc.page_content)
+        unique.append((rank, doc))
+
+    # Offset-based merging for chunks that know where they came from
+    spans = []
+    by_location = {}
+    for rank, doc in unique:
+        if "start_index" in doc.metadata:
+            location = (doc.metadata.get("source"), doc.metadata.get("page"))
+            by_location.setdefault(location, []).append((doc.metadata["start_index"], rank, doc.page_content))
+        else:
+            spans.append([doc.page_content, rank])
+    for chunks in by_location.values():
+        chunks.sort()
+        start, rank, text = chunks[0]
+        for next_start, next_rank, next_text in chunks[1:]:
+            end = start + len(text)
+            if next_start <= end:
+                text += next_text[end - next_start:]
+                rank = min(rank, next_rank)
+            else:
+                spans.append([text, rank])
+                start, rank, text = next_start, next_rank, next_text
+        spans.append([text, rank])
+
+    # Text-overlap merging for the remaining spans (e.g. chunks stored without offsets)
+    merged = True
+    while merged:
+        merged = False
+        for i, left in enumerate(spans):
+            for j, right in enumerate(spans):
+                if i == j:
+                    continue
+                if right[0] in left[0]:
+                    left[1] = min(left[1], right[1])
+                    del spans[j]
+                    merged = True
+                    break
+                overlap = _text_overlap(left[0], right[0], max_overlap)
+                if overlap:
+                    left[0] += right[0][overlap:]
+                    left[1] = min(left[1], right[1])
+                    del spans[j]
+                    merged = True
+                    break
+            if merged:
+                break
+
+    return sorted(((text, rank) for text, rank in spans), key=lambda span: span[1])
+
+def pack_context(docs, max_tokens, count_tokens, separator="\n\n"):
+    """Return the merged spans of docs, best-ranked first, joined within max_tokens."""
+    packed = []
+    used = 0
+    separator_tokens = count_tokens(separator)
+    for text, _ in merge_spans(docs):
+        tokens = count_tokens(text) + (separator_tokens if packed else 0)
+        if used + tokens <= max_tokens:
+            packed.append(text)
+            used += tokens
+        elif not packed:
+            # Even the best span is over budget: keep a proportional prefix of it
+            packed.append(text[:max(1, len(text) * max_tokens // tokens)])
+            used = max_tokens
+            break
+    context = separator.join(packed)
+
+    if metrics.enabled():
+        raw_tokens = count_tokens(separator.join(doc.page_content for doc in docs))
+        metrics.observe("psu_context_tokens", used, metrics.COUNT_BUCKETS)
+        metrics.observe("psu_context_tokens_saved", max(0, raw_tokens - used), metrics.COUNT_BUCKETS)
+        metrics.inc("psu_context_tokens_saved_total", max(0, raw_tokens - used))
+    return context
@@ -1,12 +1,111 @@
-from langchain.document_loaders import UnstructuredPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-
-def load_document(pdf_path):
-    """Load a PDF document using UnstructuredPDFLoader."""
-    loader = UnstructuredPDFLoader(pdf_path)
-    return loader.load()
-
-def recursive_chunk(data, chunk_size=512, chunk_overlap=100):
-    """Split loaded document into chunks using RecursiveCharacterTextSplitter."""
-    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-    return splitter.split_documents(data)
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from langchain_core.documents import Document
+
+# Bump whenever the loader/splitter output changes so stale chunk stores are discarded
+CHUNK_STORE_VERSION = 2
+# Bump whenever the page-sharded parser's text extraction changes
+PAGE_PARSER_VERSION = 1
+
+def load_document(pdf_path):
+    """Load a PDF document using UnstructuredPDFLoader."""
+    # Imported here: the loader pulls in langchain_community and unstructured, needed only to parse
+    from langchain.document_loaders import UnstructuredPDFLoader
+    loader = UnstructuredPDFLoader(pdf_path)
+    return loader.load()
+
+def recursive_chunk(data, chunk_size=512, chunk_overlap=100):
+    """Split loaded document into chunks using RecursiveCharacterTextSplitter, recording start_index offsets."""
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=True)
+    return splitter.split_documents(data)
+
+def count_pages(pdf_path):
+    """Return the number of pages in a PDF without extracting any text."""
+    from pdfminer.pdfpage import PDFPage
+    with open(pdf_path, "rb") as f:
+        return sum(1 for _ in PDFPage.get_pages(f))
+
+def _extract_page_range(shard):
+    """Extract the text of each page in [first, last); runs inside a worker process."""
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+    pdf_path, first, last = shard
+    return [
+        "".join(element.get_text() for element in page if isinstance(element, LTTextContainer))
+        for page in extract_pages(pdf_path, page_numbers=range(first, last))
+    ]
+
+def iter_pages(pdf_path, workers=None, pages_per_shard=8):
+    """Yield one Document per page, parsing page-range shards across a process pool.
+
+    Shards are yielded in page order as they complete, so the output is the
+    same for any worker count. workers=1 parses serially in-process.
+    """
+    page_count = count_pages(pdf_path)
+    shards = [(pdf_path, first, min(first + pages_per_shard, page_count))
+              for first in range(0, page_count, pages_per_shard)]
+    if workers == 1 or len(shards) <= 1:
+        results = map(_extract_page_range, shards)
+        for (_, first, _), texts in zip(shards, results):
+            for offset, text in enumerate(texts):
+                yield Document(page_content=text, metadata={"source": pdf_path, "page": first + offset + 1})
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for (_, first, _), texts in zip(shards, pool.map(_extract_page_range, shards)):
+            for offset, text in enumerate(texts):
+                yield Document(page_content=text, metadata={"source": pdf_path, "page": first + offset + 1})
+
+def chunk_pages(pages, chunk_size=512, chunk_overlap=100):
+    """Split page documents into chunks as they stream in.
+
+    Each chunk keeps its page number and its character offset within the page (start_index).
+    """
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=True)
+    for page in pages:
+        yield from splitter.split_documents([page])
+
+def load_and_chunk_pages(pdf_path, chunk_size=512, chunk_overlap=100, workers=None, pages_per_shard=8):
+    """Parse a PDF page-sharded in parallel and return its chunks in page order."""
+    return list(chunk_pages(iter_pages(pdf_path, workers, pages_per_shard), chunk_size, chunk_overlap))
+
+def file_hash(path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def chunk_store_key(pdf_path, chunk_size=512, chunk_overlap=100):
+    """Build the chunk store key from the PDF content hash and chunking settings."""
+    return f"v{CHUNK_STORE_VERSION}:{file_hash(pdf_path)}:{chunk_size}:{chunk_overlap}"
+
+def save_chunks(chunks, store_path, key):
+    """Write chunks to a JSON chunk store tagged with the given key."""
+    os.makedirs(os.path.dirname(store_path) or ".", exist_ok=True)
+    payload = {
+        "version": CHUNK_STORE_VERSION,
+        "key": key,
+        "chunks": [{"page_content": c.page_content, "metadata": c.metadata} for c in chunks],
+    }
+    tmp_path = f"{store_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, store_path)
+
+def load_chunks(store_path, key):
+    """Load chunks from the chunk store, or return None if it is missing or stale."""
+    if not os.path.exists(store_path):
+        return None
+    try:
+        with open(store_path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if payload.get("version") != CHUNK_STORE_VERSION or payload.get("key") != key:
+        return None
+    return [Document(page_content=c["page_content"], metadata=c["metadata"]) for c in payload["chunks"]]
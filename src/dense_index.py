@@ -0,0 +1,331 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+from typing import Any, List
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+# Bump whenever the on-disk layout changes
+DENSE_INDEX_VERSION = 2
+QUANTIZED_INDEX_VERSION = 2
+
+QUANTIZED_DTYPES = ("float32", "float16", "int8")
+# Byte alignment of each section in the quantized vectors file
+_ALIGNMENT = 64
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def _top_k(scores, k):
+    """Return (indices, scores) of the k best columns of each row of scores, best first."""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.empty((len(scores), 0), dtype=np.int64), np.empty((len(scores), 0), dtype=np.float32)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+def block_top_k(matrix, queries, k, scales=None, block_rows=4096):
+    """Exact top-k of queries against the rows of matrix, scanned block_rows at a time.
+
+    matrix may be a memmap of any dtype; only one block is upcast to float32
+    at a time. Scores of each row are multiplied by its entry in scales, if given.
+    """
+    best_indices = np.empty((len(queries), 0), dtype=np.int64)
+    best_scores = np.empty((len(queries), 0), dtype=np.float32)
+    for start in range(0, len(matrix), block_rows):
+        block = np.asarray(matrix[start:start + block_rows], dtype=np.float32)
+        scores = queries @ block.T
+        if scales is not None:
+            scores *= scales[start:start + block_rows]
+        indices, scores = _top_k(scores, k)
+        indices = np.concatenate([best_indices, indices + start], axis=1)
+        scores = np.concatenate([best_scores, scores], axis=1)
+        order, best_scores = _top_k(scores, k)
+        best_indices = np.take_along_axis(indices, order, axis=1)
+    return best_indices, best_scores
+
+def _quantize(block, dtype):
+    """Return (codes, scales) for a block of normalized float32 vectors."""
+    if dtype == "int8":
+        scales = np.abs(block).max(axis=1) / 127
+        scales[scales == 0] = 1.0
+        return np.round(block / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+    return block.astype(dtype), np.ones(len(block), dtype=np.float32)
+
+class _RowReader:
+    """Reads single float32 rows from a file with plain unbuffered reads.
+
+    Used for rescoring instead of a memory map: faulting in a few scattered
+    rows of a mapping can pull large page-cache folios into every worker's
+    resident set, while a read copies only the bytes asked for.
+    """
+
+    def __init__(self, path, offset, dimension):
+        self.offset = offset
+        self.dimension = dimension
+        self._file = open(path, "rb", buffering=0)
+        self._lock = threading.Lock()
+
+    def read(self, indices):
+        row_bytes = self.dimension * 4
+        rows = np.empty((len(indices), self.dimension), dtype=np.float32)
+        with self._lock:
+            for i, index in enumerate(indices):
+                self._file.seek(self.offset + int(index) * row_bytes)
+                rows[i] = np.frombuffer(self._file.read(row_bytes), dtype=np.float32)
+        return rows
+
+def _collection_records(vector_store):
+    data = vector_store._collection.get(include=["embeddings", "documents", "metadatas"])
+    records = [{"page_content": text, "metadata": metadata or {}}
+               for text, metadata in zip(data["documents"], data["metadatas"])]
+    return np.asarray(data["embeddings"], dtype=np.float32), records
+
+def _version_dir(index_dir, version, key):
+    """Return the subdirectory of index_dir holding the index for key.
+
+    Each key gets its own directory, so re-exporting never touches the files
+    that other workers still have loaded or memory-mapped.
+    """
+    digest = hashlib.sha256(f"{version}:{key}".encode("utf-8")).hexdigest()[:16]
+    return os.path.join(index_dir, digest)
+
+def _private_dir(target):
+    """Create and return an empty directory to write target's files into before publishing."""
+    tmp_dir = f"{target}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    return tmp_dir
+
+def _publish(tmp_dir, target, legacy_files):
+    """Rename a fully written index directory into place and delete indexes for other keys.
+
+    Readers only ever see complete indexes. Workers that still map a deleted
+    index keep reading the unlinked files; legacy_files are the files of the
+    old layout written directly into the index directory.
+    """
+    try:
+        os.replace(tmp_dir, target)
+    except OSError:
+        # Another worker finished the same index first; keep theirs
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    index_dir = os.path.dirname(target)
+    for name in os.listdir(index_dir):
+        path = os.path.join(index_dir, name)
+        if path != target and os.path.isdir(path) and ".tmp" not in name:
+            shutil.rmtree(path, ignore_errors=True)
+    for name in legacy_files:
+        try:
+            os.remove(os.path.join(index_dir, name))
+        except OSError:
+            pass
+
+def _read_meta(index_dir, version, key):
+    meta_path = os.path.join(index_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != version or meta.get("key") != key:
+        return None
+    return meta
+
+def _load_docs(index_dir):
+    with open(os.path.join(index_dir, "documents.json"), "r", encoding="utf-8") as f:
+        records = json.load(f)
+    return [Document(page_content=r["page_content"], metadata=r["metadata"]) for r in records]
+
+class DenseIndex:
+    """Exact cosine-similarity index over a contiguous, L2-normalized embedding matrix.
+
+    Exported once from a Chroma collection; documents are rebuilt once at load
+    time so queries only do a matmul, an argpartition and list lookups.
+    """
+
+    def __init__(self, vectors, docs):
+        self.vectors = vectors
+        self.docs = docs
+
+    def __len__(self):
+        return len(self.docs)
+
+    @classmethod
+    def export(cls, vector_store, index_dir, key, dtype="float32"):
+        """Copy the collection's embeddings and documents to index_dir and return the loaded index."""
+        vectors, records = _collection_records(vector_store)
+        vectors = _normalize(vectors).astype(dtype)
+
+        target = _version_dir(index_dir, DENSE_INDEX_VERSION, key)
+        os.makedirs(index_dir, exist_ok=True)
+        tmp_dir = _private_dir(target)
+        np.save(os.path.join(tmp_dir, "vectors.npy"), np.ascontiguousarray(vectors))
+        with open(os.path.join(tmp_dir, "documents.json"), "w", encoding="utf-8") as f:
+            json.dump(records, f)
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": DENSE_INDEX_VERSION, "key": key, "count": len(records), "dtype": dtype}, f)
+        _publish(tmp_dir, target, ("vectors.npy", "documents.json", "meta.json"))
+        return cls.load(index_dir, key)
+
+    @classmethod
+    def load(cls, index_dir, key):
+        """Load an exported index, or return None if it is missing or stale."""
+        index_dir = _version_dir(index_dir, DENSE_INDEX_VERSION, key)
+        if _read_meta(index_dir, DENSE_INDEX_VERSION, key) is None:
+            return None
+        try:
+            vectors = np.load(os.path.join(index_dir, "vectors.npy"))
+            docs = _load_docs(index_dir)
+        except (OSError, ValueError):
+            return None
+        return cls(vectors, docs)
+
+    def search(self, query_vectors, k):
+        """Return (indices, scores) of the exact top-k for each query, best first.
+
+        query_vectors is a single vector or a (m, d) batch; results are (m, k).
+        """
+        queries = _normalize(np.atleast_2d(np.asarray(query_vectors, dtype=np.float32)))
+        return _top_k(queries @ self.vectors.T.astype(np.float32, copy=False), k)
+
+class QuantizedDenseIndex:
+    """Dense index stored as one read-only memory-mapped file shared by every worker.
+
+    The file holds float16 or int8 codes with per-vector float32 scales and,
+    optionally, the float32 vectors used to rescore the top k * rescore
+    candidates. Worker processes map the same code pages from the page cache
+    instead of each keeping a private float32 copy; rescoring reads just the
+    candidate rows. int8 is the faster format to scan, as NumPy converts
+    float16 to float32 in software.
+    """
+
+    def __init__(self, codes, scales, full, docs, rescore=4):
+        self.codes = codes
+        self.scales = scales
+        self.full = full
+        self.docs = docs
+        self.rescore = rescore
+
+    def __len__(self):
+        return len(self.codes)
+
+    @classmethod
+    def build(cls, vectors, records, index_dir, key, dtype="int8", keep_full=True, block_rows=4096):
+        """Write vectors (an array or memmap, read block_rows at a time) and records to index_dir.
+
+        The files are written to a private directory and renamed into the
+        key's versioned subdirectory in one step, so a worker never maps a
+        vectors file against another build's meta.
+        """
+        if dtype not in QUANTIZED_DTYPES:
+            raise ValueError(f"Unsupported dtype {dtype!r}; expected one of {QUANTIZED_DTYPES}")
+        count, dimension = vectors.shape
+        keep_full = keep_full and dtype != "float32"
+        codes_offset = 0
+        scales_offset = -(-(count * dimension * np.dtype(dtype).itemsize) // _ALIGNMENT) * _ALIGNMENT
+        full_offset = -(-(scales_offset + count * 4) // _ALIGNMENT) * _ALIGNMENT
+
+        target = _version_dir(index_dir, QUANTIZED_INDEX_VERSION, key)
+        os.makedirs(index_dir, exist_ok=True)
+        tmp_dir = _private_dir(target)
+        scales = np.empty(count, dtype=np.float32)
+        with open(os.path.join(tmp_dir, "vectors.bin"), "wb") as f:
+            for start in range(0, count, block_rows):
+                block = _normalize(np.asarray(vectors[start:start + block_rows], dtype=np.float32))
+                codes, scales[start:start + len(block)] = _quantize(block, dtype)
+                f.write(codes.tobytes())
+            f.seek(scales_offset)
+            f.write(scales.tobytes())
+            if keep_full:
+                f.seek(full_offset)
+                for start in range(0, count, block_rows):
+                    block = _normalize(np.asarray(vectors[start:start + block_rows], dtype=np.float32))
+                    f.write(block.tobytes())
+        with open(os.path.join(tmp_dir, "documents.json"), "w", encoding="utf-8") as f:
+            json.dump(records, f)
+        meta = {"version": QUANTIZED_INDEX_VERSION, "key": key, "count": count, "dimension": dimension,
+                "dtype": dtype, "codes_offset": codes_offset, "scales_offset": scales_offset,
+                "full_offset": full_offset if keep_full else None}
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        _publish(tmp_dir, target, ("vectors.bin", "documents.json", "meta.json"))
+
+    @classmethod
+    def export(cls, vector_store, index_dir, key, dtype="int8", keep_full=True, rescore=4):
+        """Quantize the collection's embeddings into index_dir and return the loaded index."""
+        vectors, records = _collection_records(vector_store)
+        cls.build(vectors, records, index_dir, key, dtype, keep_full)
+        return cls.load(index_dir, key, rescore)
+
+    @classmethod
+    def load(cls, index_dir, key, rescore=4):
+        """Memory-map an index built by build, or return None if it is missing or stale."""
+        index_dir = _version_dir(index_dir, QUANTIZED_INDEX_VERSION, key)
+        meta = _read_meta(index_dir, QUANTIZED_INDEX_VERSION, key)
+        if meta is None:
+            return None
+        path = os.path.join(index_dir, "vectors.bin")
+        shape = (meta["count"], meta["dimension"])
+        try:
+            if meta["count"] == 0:
+                codes = np.empty(shape, dtype=meta["dtype"])
+                scales = np.empty(0, dtype=np.float32)
+                full = None
+            else:
+                codes = np.memmap(path, dtype=meta["dtype"], mode="r", offset=meta["codes_offset"], shape=shape)
+                scales = np.memmap(path, dtype=np.float32, mode="r", offset=meta["scales_offset"],
+                                   shape=(meta["count"],))
+                full = None
+                if meta["full_offset"] is not None:
+                    full = _RowReader(path, meta["full_offset"], meta["dimension"])
+            docs = _load_docs(index_dir)
+        except (OSError, ValueError):
+            return None
+        return cls(codes, scales, full, docs, rescore)
+
+    def search(self, query_vectors, k):
+        """Return (indices, scores) of the approximate top-k for each query, best first.
+
+        Candidates are scored against the quantized codes; when full-precision
+        vectors are stored and rescore > 1, the best k * rescore candidates are
+        rescored against them before the final top-k.
+        """
+        queries = _normalize(np.atleast_2d(np.asarray(query_vectors, dtype=np.float32)))
+        if self.full is None or self.rescore <= 1:
+            return block_top_k(self.codes, queries, k, self.scales)
+        candidates, _ = block_top_k(self.codes, queries, k * self.rescore, self.scales)
+        rows = self.full.read(candidates.ravel()).reshape(candidates.shape + (-1,))
+        indices, scores = _top_k(np.einsum("mcd,md->mc", rows, queries), k)
+        return np.take_along_axis(candidates, indices, axis=1), scores
+
+class NumpyDenseRetriever(BaseRetriever):
+    """Dense retriever that embeds the query and searches a DenseIndex."""
+
+    embeddings: Any
+    index: Any
+    k: int = 4
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        indices, _ = self.index.search(self.embeddings.embed_query(query), self.k)
+        return [self.index.docs[i] for i in indices[0]]
+
+    def batch_search(self, queries: List[str]) -> List[List[Document]]:
+        """Retrieve for several queries with one embedding batch and one matmul."""
+        if hasattr(self.embeddings, "embed_queries"):
+            vectors = self.embeddings.embed_queries(queries)
+        else:
+            vectors = self.embeddings.embed_documents(queries)
+        indices, _ = self.index.search(vectors, self.k)
+        return [[self.index.docs[i] for i in row] for row in indices]
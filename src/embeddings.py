@@ -0,0 +1,174 @@
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List
+from langchain_core.embeddings import Embeddings
+from src import metrics
+
+def normalize_query(text):
+    """Normalize query text for cache lookups: casefold and collapse whitespace."""
+    return " ".join(text.casefold().split())
+
+class LocalEmbeddings(Embeddings):
+    """In-process CPU embedding engine built on sentence-transformers.
+
+    Document batches are encoded on a thread pool. Concurrent ``embed_query``
+    calls are collected for up to ``max_batch_wait_ms`` and encoded together
+    in one forward pass (dynamic batching).
+    """
+
+    def __init__(self, model_name="BAAI/bge-base-en-v1.5", device="cpu", batch_size=32,
+                 max_batch_wait_ms=5, max_workers=2, model_backend="torch"):
+        # Imported here so the API backend never pays for loading torch
+        from sentence_transformers import SentenceTransformer
+
+        model_kwargs = {} if model_backend == "torch" else {"backend": model_backend}
+        self.model = SentenceTransformer(model_name, device=device, **model_kwargs)
+        self.batch_size = batch_size
+        self.max_batch_wait = max_batch_wait_ms / 1000
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="embed")
+        self._queries = queue.Queue()
+        self._dispatcher = threading.Thread(target=self._dispatch_queries, name="embed-batcher", daemon=True)
+        self._dispatcher.start()
+
+    @property
+    def dimension(self):
+        """Return the size of the vectors this model produces."""
+        return self.model.get_sentence_embedding_dimension()
+
+    def _encode(self, texts):
+        vectors = self.model.encode(texts, batch_size=self.batch_size, normalize_embeddings=True,
+                                    convert_to_numpy=True, show_progress_bar=False)
+        return vectors.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        vectors = []
+        for batch_vectors in self._executor.map(self._encode, batches):
+            vectors.extend(batch_vectors)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        future = Future()
+        self._queries.put((text, future))
+        return future.result()
+
+    def _dispatch_queries(self):
+        """Group queued queries into batches and hand them to the thread pool."""
+        while True:
+            batch = [self._queries.get()]
+            deadline = time.monotonic() + self.max_batch_wait
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queries.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self._executor.submit(self._run_query_batch, batch)
+
+    def _run_query_batch(self, batch):
+        try:
+            vectors = self._encode([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), vector in zip(batch, vectors):
+            future.set_result(vector)
+
+class InferenceEmbeddings(Embeddings):
+    """Feature-extraction client for the HuggingFace Inference API.
+
+    Requests go through the shared InferenceTransport, in batches of at most
+    batch_size texts; they are idempotent, so the transport may hedge them.
+    """
+
+    def __init__(self, model_name, transport, batch_size=32):
+        self.model_name = model_name
+        self.transport = transport
+        self.batch_size = batch_size
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self.transport.post(
+                f"/pipeline/feature-extraction/{self.model_name}",
+                {"inputs": texts[start:start + self.batch_size], "options": {"wait_for_model": True}},
+            ))
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+class CachedEmbeddings(Embeddings):
+    """Wrap an embedding model with a bounded LRU cache of query embeddings."""
+
+    def __init__(self, base, max_size=1024):
+        self.base = base
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def dimension(self):
+        """Return the wrapped model's dimension, or None if it does not expose one."""
+        return getattr(self.base, "dimension", None)
+
+    def _get(self, key):
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def _put(self, key, vector):
+        with self._lock:
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    def _timed(self, fn, *args):
+        """Call the model, recording the time as the embedding stage of the query path."""
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            metrics.observe("psu_stage_seconds", time.perf_counter() - start, stage="embedding",
+                            component=type(self.base).__name__)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.base.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = normalize_query(text)
+        vector = self._get(key)
+        if vector is None:
+            vector = self._timed(self.base.embed_query, text)
+            self._put(key, vector)
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries, sending all cache misses to the model in one batch."""
+        keys = [normalize_query(t) for t in texts]
+        vectors = [self._get(k) for k in keys]
+        missing = {}
+        for text, key, vector in zip(texts, keys, vectors):
+            if vector is None and key not in missing:
+                missing[key] = text
+        fresh = {}
+        if missing:
+            fresh = dict(zip(missing, self._timed(self.base.embed_documents, list(missing.values()))))
+            for key, vector in fresh.items():
+                self._put(key, vector)
+        # Built from the model's results, not re-read: a large batch may already have evicted them
+        return [v if v is not None else fresh[k] for k, v in zip(keys, vectors)]
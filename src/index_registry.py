@@ -0,0 +1,251 @@
+"""Serve many document collections from one process.
+
+Each named collection (e.g. one campus's or one office's citizen charter)
+has its own Chroma directory and BM25/dense companions under
+root_directory/<name>, and is served by its own PSUChatBackend. The LLM and
+embedding clients are shared. Collections are loaded on first use; when
+the loaded collections exceed memory_budget_mb, the least recently used
+ones that are not answering a query are closed. Concurrent first requests
+for a collection share a single load.
+"""
+import os
+import gc
+import ctypes
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import Future
+from src.backend_config import PSUChatBackend, HF_TOKEN
+from src.retriever import create_embedding_model
+from src.llm import setup_llm
+import logging
+
+logger = logging.getLogger(__name__)
+
+def directory_size(path):
+    """Return the total size in bytes of the files under path."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def release_memory():
+    """Collect garbage and hand freed heap pages back to the OS where glibc allows it."""
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+class IndexRegistry:
+    """Lazily loaded, LRU-evicted backends for named document collections.
+
+    A collection's footprint is estimated as the size of its index files on
+    disk plus collection_overhead_mb for the Chroma client, chunk objects
+    and chain. The most recently loaded collection is never evicted, so a
+    single collection larger than the budget still loads.
+    """
+
+    def __init__(self, root_directory="collections", memory_budget_mb=1024, collection_overhead_mb=6,
+                 embedding_backend="api", embeddings=None, llm=None, **backend_options):
+        self.root_directory = root_directory
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.collection_overhead = collection_overhead_mb * 1024 * 1024
+        self.embedding_backend = embedding_backend
+        self.embeddings = embeddings
+        self.llm = llm
+        # Passed to every PSUChatBackend, e.g. dense_backend or max_context_tokens
+        self.backend_options = backend_options
+        self.loads = 0
+        self.evictions = 0
+        self._sources = {}
+        self._loaded = OrderedDict()
+        self._footprints = {}
+        self._loading = {}
+        self._leases = {}
+        self._lock = threading.Lock()
+        self._clients_lock = threading.Lock()
+
+    def register(self, name, pdf_path=None, data_dir=None):
+        """Register a collection built from one PDF or from every PDF in data_dir."""
+        if not pdf_path and not data_dir:
+            raise ValueError("Either pdf_path or data_dir is required")
+        with self._lock:
+            self._sources[name] = (pdf_path, data_dir)
+
+    def register_directory(self, data_root):
+        """Register each subdirectory of data_root as a collection of its PDFs, named after it."""
+        for name in sorted(os.listdir(data_root)):
+            path = os.path.join(data_root, name)
+            if os.path.isdir(path):
+                self.register(name, data_dir=path)
+
+    @property
+    def names(self):
+        with self._lock:
+            return list(self._sources)
+
+    @property
+    def loaded(self):
+        """Names of the loaded collections, least recently used first."""
+        with self._lock:
+            return list(self._loaded)
+
+    @property
+    def memory_used(self):
+        """Estimated bytes held by the loaded collections."""
+        with self._lock:
+            return sum(self._footprints.values())
+
+    def _shared_clients(self):
+        """Create the LLM and embedding clients once for all collections."""
+        with self._clients_lock:
+            if self.embeddings is None:
+                self.embeddings = create_embedding_model(HF_TOKEN, backend=self.embedding_backend)
+            if self.llm is None:
+                self.llm = setup_llm()
+            return self.embeddings, self.llm
+
+    def _load(self, name):
+        pdf_path, data_dir = self._sources[name]
+        persist_directory = os.path.join(self.root_directory, name, "chroma_db")
+        logger.info("Loading collection %s from %s", name, persist_directory)
+        backend = PSUChatBackend(persist_directory, **self.backend_options)
+        try:
+            embeddings, llm = self._shared_clients()
+            success, message = backend.initialize_system(pdf_path, llm=llm, data_dir=data_dir, embeddings=embeddings)
+        except Exception:
+            backend.close()
+            raise
+        if not success:
+            # Release the Chroma client and cache writer a failed initialization may have opened
+            backend.close()
+            return None, False, message, 0
+        footprint = (directory_size(backend.persist_directory) + directory_size(backend.cache_directory)
+                     + self.collection_overhead)
+        return backend, success, message, footprint
+
+    def _get(self, name):
+        """Return (backend, success, message) for the collection, loading it on first use.
+
+        Concurrent callers for a collection that is not loaded yet wait for
+        one shared load; a failed load is retried by the next caller. The
+        backend is not leased and may be evicted and closed at any time, so
+        callers go through lease, generate_response or stream_response.
+        """
+        with self._lock:
+            if name not in self._sources:
+                return None, False, f"Unknown collection: {name}"
+            backend = self._loaded.get(name)
+            if backend is not None:
+                self._loaded.move_to_end(name)
+                return backend, True, "System initialized successfully!"
+            future = self._loading.get(name)
+            leader = future is None
+            if leader:
+                future = self._loading[name] = Future()
+                self.loads += 1
+        if not leader:
+            return future.result()
+
+        try:
+            backend, success, message, footprint = self._load(name)
+        except Exception as e:
+            logger.error("Error loading collection %s: %s", name, str(e), exc_info=True)
+            backend, success, message, footprint = None, False, f"Error loading collection {name}: {str(e)}", 0
+        with self._lock:
+            if success:
+                self._loaded[name] = backend
+                self._footprints[name] = footprint
+            del self._loading[name]
+            evicted = self._over_budget() if success else []
+        future.set_result((backend, success, message))
+        self._close(evicted)
+        return backend, success, message
+
+    def _over_budget(self):
+        """Remove least recently used idle collections until within budget; return them. Holds _lock."""
+        evicted = []
+        used = sum(self._footprints.values())
+        for name in list(self._loaded)[:-1]:
+            if used <= self.memory_budget:
+                break
+            if self._leases.get(name):
+                continue
+            used -= self._footprints.pop(name)
+            evicted.append((name, self._loaded.pop(name)))
+            self.evictions += 1
+        return evicted
+
+    def _close(self, evicted):
+        for name, backend in evicted:
+            logger.info("Evicting collection %s", name)
+            backend.close()
+        if evicted:
+            release_memory()
+
+    def _acquire(self, name):
+        """Return (backend, success, message) with the collection protected from eviction on success."""
+        while True:
+            backend, success, message = self._get(name)
+            if not success:
+                return backend, success, message
+            with self._lock:
+                # It may have been evicted between loading and leasing
+                if self._loaded.get(name) is backend:
+                    self._leases[name] = self._leases.get(name, 0) + 1
+                    return backend, success, message
+
+    def _release(self, name):
+        with self._lock:
+            self._leases[name] -= 1
+            if not self._leases[name]:
+                del self._leases[name]
+            evicted = self._over_budget()
+        self._close(evicted)
+
+    @contextmanager
+    def lease(self, name):
+        """Yield the collection's backend, loading it on first use and protecting it from eviction.
+
+        Raises RuntimeError if the collection is unknown or failed to load.
+        """
+        backend, success, message = self._acquire(name)
+        if not success:
+            raise RuntimeError(message)
+        try:
+            yield backend
+        finally:
+            self._release(name)
+
+    def generate_response(self, name, query):
+        """Answer query from the named collection; returns (success, response)."""
+        backend, success, message = self._acquire(name)
+        if not success:
+            return False, message
+        try:
+            return backend.generate_response(query)
+        finally:
+            self._release(name)
+
+    def stream_response(self, name, query):
+        """Yield the answer to query from the named collection chunk by chunk.
+
+        Raises RuntimeError if the collection is unknown or failed to load.
+        """
+        with self.lease(name) as backend:
+            yield from backend.stream_response(query)
+
+    def close(self):
+        """Close every loaded collection."""
+        with self._lock:
+            loaded = list(self._loaded.values())
+            self._loaded.clear()
+            self._footprints.clear()
+        for backend in loaded:
+            backend.close()
+        release_memory()
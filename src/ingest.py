@@ -0,0 +1,197 @@
+"""Incremental ingestion of a directory of PDFs into the vector store.
+
+Every chunk gets a stable id derived from its source document and content.
+A manifest next to the Chroma directory records, per document, the file
+hash and the chunks it produced, so each run only embeds new or changed
+chunks and deletes chunks of removed documents. Re-running on unchanged
+input makes no embedding calls.
+
+Run once, or keep watching the directory for changes:
+    python -m src.ingest data
+    python -m src.ingest data --watch
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import argparse
+from langchain_core.documents import Document
+from src.data_processing import load_and_chunk_pages, file_hash, PAGE_PARSER_VERSION
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the manifest layout or chunk id scheme changes
+MANIFEST_VERSION = 1
+
+# Directory-ingested collections live apart from the single-PDF store in chroma_db,
+# whose chunks come from a different parser
+DEFAULT_PERSIST_DIRECTORY = "chroma_db_docs"
+
+def discover_documents(data_dir):
+    """Return the PDF files under data_dir in a stable order."""
+    paths = []
+    for root, _, files in os.walk(data_dir):
+        paths.extend(os.path.join(root, f) for f in files if f.lower().endswith(".pdf"))
+    return sorted(os.path.normpath(p) for p in paths)
+
+def assign_chunk_ids(source, chunks):
+    """Return (id, chunk) pairs with ids stable across runs for identical content."""
+    seen = {}
+    records = []
+    for chunk in chunks:
+        occurrence = seen.get(chunk.page_content, 0)
+        seen[chunk.page_content] = occurrence + 1
+        digest = hashlib.sha256(f"{source}\0{occurrence}\0{chunk.page_content}".encode("utf-8")).hexdigest()
+        records.append((digest[:32], chunk))
+    return records
+
+def corpus_key(chunk_ids):
+    """Return a key identifying an exact set and order of chunks, used to tag derived indexes."""
+    return hashlib.sha256("\n".join(chunk_ids).encode("utf-8")).hexdigest()
+
+def _load_manifest(manifest_path):
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == MANIFEST_VERSION else None
+
+def _save_manifest(manifest, manifest_path):
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+
+def ingest_directory(data_dir, vector_store, manifest_path, chunk_size=512, chunk_overlap=100, batch_size=64,
+                     parse_workers=None):
+    """Sync the vector store with the PDFs in data_dir.
+
+    Changed documents are parsed page-sharded across parse_workers processes.
+    Returns (chunks, key, stats): every current chunk in stable order, the
+    corpus key of those chunks and counts of what changed.
+    """
+    settings = f"pages{PAGE_PARSER_VERSION}:{chunk_size}:{chunk_overlap}"
+    manifest = _load_manifest(manifest_path)
+    if manifest is None:
+        # Without a manifest the ids in the store are unknown; never clear a store ingest did not build
+        existing = vector_store.get(limit=1, include=[])["ids"]
+        if existing:
+            raise ValueError(
+                f"The vector store already holds chunks but has no ingest manifest at {manifest_path}. "
+                f"Ingest into a separate persist directory (default {DEFAULT_PERSIST_DIRECTORY}), "
+                "or delete this one to rebuild it."
+            )
+        manifest = {"version": MANIFEST_VERSION, "settings": settings, "documents": {}}
+    same_settings = manifest.get("settings") == settings
+    old_documents = manifest["documents"]
+
+    documents = {}
+    to_add = []
+    to_delete = []
+    unchanged = 0
+    for path in discover_documents(data_dir):
+        stat = os.stat(path)
+        entry = old_documents.get(path)
+        if entry and same_settings and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            documents[path] = entry
+            unchanged += 1
+            continue
+        digest = file_hash(path)
+        if entry and same_settings and entry["hash"] == digest:
+            documents[path] = dict(entry, size=stat.st_size, mtime=stat.st_mtime)
+            unchanged += 1
+            continue
+
+        logger.info("Parsing changed document %s", path)
+        records = assign_chunk_ids(path, load_and_chunk_pages(path, chunk_size, chunk_overlap, parse_workers))
+        old_ids = {c["id"] for c in entry["chunks"]} if entry else set()
+        new_ids = {chunk_id for chunk_id, _ in records}
+        to_add.extend((chunk_id, chunk) for chunk_id, chunk in records if chunk_id not in old_ids)
+        to_delete.extend(old_ids - new_ids)
+        documents[path] = {
+            "hash": digest,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "chunks": [
+                {"id": chunk_id, "page_content": chunk.page_content, "metadata": chunk.metadata}
+                for chunk_id, chunk in records
+            ],
+        }
+
+    for path, entry in old_documents.items():
+        if path not in documents:
+            logger.info("Removing chunks of deleted document %s", path)
+            to_delete.extend(c["id"] for c in entry["chunks"])
+
+    if to_delete:
+        for i in range(0, len(to_delete), 5000):
+            vector_store.delete(ids=to_delete[i:i + 5000])
+    for i in range(0, len(to_add), batch_size):
+        batch = to_add[i:i + batch_size]
+        vector_store.add_documents(
+            [Document(page_content=c.page_content, metadata=dict(c.metadata, chunk_id=chunk_id)) for chunk_id, c in batch],
+            ids=[chunk_id for chunk_id, _ in batch],
+        )
+
+    # Only record the new state once the vector store reflects it
+    _save_manifest({"version": MANIFEST_VERSION, "settings": settings, "documents": documents}, manifest_path)
+
+    chunks = [
+        Document(page_content=c["page_content"], metadata=dict(c["metadata"], chunk_id=c["id"]))
+        for path in sorted(documents) for c in documents[path]["chunks"]
+    ]
+    stats = {
+        "documents": len(documents),
+        "unchanged_documents": unchanged,
+        "added": len(to_add),
+        "deleted": len(to_delete),
+    }
+    logger.info("Ingestion finished: %s", stats)
+    return chunks, corpus_key([c.metadata["chunk_id"] for c in chunks]), stats
+
+def _directory_signature(data_dir):
+    signature = []
+    for path in discover_documents(data_dir):
+        stat = os.stat(path)
+        signature.append((path, stat.st_size, stat.st_mtime))
+    return signature
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally ingest a directory of PDFs into Chroma.")
+    parser.add_argument("data_dir", nargs="?", default="data")
+    parser.add_argument("--persist-directory", default=DEFAULT_PERSIST_DIRECTORY)
+    parser.add_argument("--embedding-backend", default=os.getenv("EMBEDDING_BACKEND", "api"))
+    parser.add_argument("--watch", action="store_true", help="keep running and re-ingest on changes")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between checks in --watch mode")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    args = parser.parse_args()
+
+    # Imported here: backend_config imports this module
+    from src.backend_config import PSUChatBackend, HF_TOKEN
+    from src.retriever import create_embedding_model, open_vector_store
+
+    backend = PSUChatBackend(args.persist_directory)
+    embeddings = create_embedding_model(HF_TOKEN, backend=args.embedding_backend)
+    vector_store = open_vector_store(embeddings, args.persist_directory)
+
+    signature = None
+    while True:
+        current = _directory_signature(args.data_dir)
+        if current != signature:
+            chunks, key, _ = ingest_directory(args.data_dir, vector_store, backend.ingest_manifest_path,
+                                              backend.chunk_size, backend.chunk_overlap,
+                                              parse_workers=args.workers)
+            backend.chunks, backend.chunk_key = chunks, key
+            backend._load_bm25_index()
+            signature = current
+        if not args.watch:
+            break
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main()
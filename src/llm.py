@@ -1,40 +1,157 @@
-from langchain_community.llms import HuggingFaceHub
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
-
-def setup_llm():
-    """Initialize the LLM via HuggingFaceHub with specified parameters."""
-    return HuggingFaceHub(
-        repo_id="mistralai/Mistral-7B-Instruct-v0.3",
-        model_kwargs={
-            "max_new_tokens": 512,
-            "temperature": 0.5,
-            "repetition_penalty": 1.1,
-            "return_full_text": False
-        }
-    )
-
-def setup_prompt_template():
-    """Create a prompt template and output parser for the chain."""
-    template = (
-        "<|system|>\n"
-        "You are a friendly AI Assistant for Partido State University that understands users extremely well and always responds professionally.\n"
-        "Please be truthful and give direct answers. If the user query is not in CONTEXT, then ask again for clarification.\n"
-        "You can't process any transaction you can only explain it.</s>\n"
-        "CONTEXT: {context}</s>\n"
-        "<|user|> {query} </s>\n"
-        "<|assistant|>"
-    )
-    prompt = ChatPromptTemplate.from_template(template)
-    output_parser = StrOutputParser()
-    return prompt, output_parser
-
-def assemble_chain(retriever, prompt, llm, output_parser):
-    """Assemble the chain using retriever, prompt, LLM, and output parser."""
-    return (
-        {"context": retriever, "query": RunnablePassthrough()}
-        | prompt
-        | llm
-        | output_parser
-    )
+import os
+import re
+import json
+import logging
+import threading
+from typing import Any, Iterator, List, Optional
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough
+from src.context import pack_context
+from src.transport import TransportError, get_transport
+
+logger = logging.getLogger(__name__)
+
+LLM_REPO_ID = "mistralai/Mistral-7B-Instruct-v0.3"
+_APPROX_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+class InferenceLLM(LLM):
+    """Text-generation client for the HuggingFace Inference API.
+
+    Requests go through the shared InferenceTransport (pooling, retries,
+    circuit breaker); streamed replies are parsed from server-sent events.
+    Sampled generations are not idempotent, so they are never hedged.
+    """
+
+    transport: Any
+    repo_id: str = LLM_REPO_ID
+    max_new_tokens: int = 512
+    temperature: float = 0.5
+    repetition_penalty: float = 1.1
+    return_full_text: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "huggingface_inference"
+
+    @property
+    def _identifying_params(self):
+        return {"repo_id": self.repo_id, "max_new_tokens": self.max_new_tokens, "temperature": self.temperature}
+
+    def _payload(self, prompt, stop, stream):
+        parameters = {
+            "max_new_tokens": self.max_new_tokens,
+            "temperature": self.temperature,
+            "repetition_penalty": self.repetition_penalty,
+            "return_full_text": self.return_full_text,
+        }
+        if stop:
+            parameters["stop"] = stop
+        return {"inputs": prompt, "parameters": parameters, "stream": stream}
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        data = self.transport.post(f"/models/{self.repo_id}", self._payload(prompt, stop, False), hedge=False)
+        if isinstance(data, list):
+            data = data[0]
+        return data["generated_text"]
+
+    def _stream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[GenerationChunk]:
+        for line in self.transport.stream(f"/models/{self.repo_id}", self._payload(prompt, stop, True)):
+            if not line.startswith("data:"):
+                continue
+            event = json.loads(line[len("data:"):])
+            if "error" in event:
+                raise TransportError(f"Generation failed: {event['error']}")
+            token = event.get("token") or {}
+            if token.get("special"):
+                continue
+            chunk = GenerationChunk(text=token.get("text", ""))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+def setup_llm(transport=None):
+    """Initialize the LLM client, which supports token streaming, on the shared transport."""
+    return InferenceLLM(transport=transport or get_transport())
+
+def setup_prompt_template():
+    """Create a prompt template and output parser for the chain."""
+    template = (
+        "<|system|>\n"
+        "You are a friendly AI Assistant for Partido State University that understands users extremely well and always responds professionally.\n"
+        "Please be truthful and give direct answers. If the user query is not in CONTEXT, then ask again for clarification.\n"
+        "You can't process any transaction you can only explain it.</s>\n"
+        "CONTEXT: {context}</s>\n"
+        "<|user|> {query} </s>\n"
+        "<|assistant|>"
+    )
+    prompt = ChatPromptTemplate.from_template(template)
+    output_parser = StrOutputParser()
+    return prompt, output_parser
+
+def assemble_chain(retriever, prompt, llm, output_parser, max_context_tokens=1536):
+    """Assemble the chain using retriever, prompt, LLM, and output parser.
+
+    Retrieved documents are deduplicated, merged and packed into at most
+    max_context_tokens before they reach the prompt; pass None to send the
+    raw document list instead.
+    """
+    context = retriever
+    if max_context_tokens is not None:
+        context = retriever | RunnableLambda(
+            lambda docs: pack_context(docs, max_context_tokens, count_tokens), name="pack_context"
+        )
+    return (
+        {"context": context, "query": RunnablePassthrough()}
+        | prompt
+        | llm
+        | output_parser
+    )
+
+_tokenizer = None
+_tokenizer_lock = threading.Lock()
+
+def load_tokenizer():
+    """Load the LLM's tokenizer if it is not loaded yet; return it, or None if it is unavailable.
+
+    The Mistral repository is gated, so the HuggingFace token is passed. This
+    imports transformers and may download files, so it is called while the
+    backend initializes rather than on the request path.
+    """
+    global _tokenizer
+    with _tokenizer_lock:
+        if _tokenizer is None:
+            try:
+                from transformers import AutoTokenizer
+                _tokenizer = AutoTokenizer.from_pretrained(LLM_REPO_ID, token=os.getenv("HUGGINGFACEHUB_API_TOKEN"))
+                logger.info("Loaded tokenizer for %s", LLM_REPO_ID)
+            except Exception as e:
+                logger.warning("Tokenizer for %s unavailable (%s); context budgets and token metrics "
+                               "will use a regex estimate of token counts", LLM_REPO_ID, str(e))
+        return _tokenizer
+
+def get_tokenizer():
+    """Return the LLM's tokenizer if load_tokenizer has loaded it, else None. Never loads it."""
+    return _tokenizer
+
+def count_tokens(text):
+    """Count tokens with the LLM's tokenizer, falling back to a word/punctuation estimate."""
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        return len(_APPROX_TOKEN_PATTERN.findall(text))
+    return len(tokenizer.encode(text, add_special_tokens=False))
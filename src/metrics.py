@@ -0,0 +1,274 @@
+"""Lightweight metrics for the RAG hot path.
+
+Histograms and counters are kept in-process and exported in the Prometheus
+text format (served at GET /metrics by src.server) or dumped periodically
+as JSON. Metrics are off unless PSU_METRICS=1 (read by configure_from_env)
+or configure(True) is called; when off, every call hits a no-op registry
+and the chain runs without the metrics callback handler, so the hot path
+pays nothing measurable.
+
+    PSU_METRICS=1                     enable collection
+    PSU_METRICS_JSON=metrics.json     also dump JSON every PSU_METRICS_INTERVAL seconds
+"""
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from typing import Any, Dict
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 4000, 8000)
+
+def _escape(value):
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class MetricsRegistry:
+    """Thread-safe store of labelled histograms, counters and callback gauges."""
+
+    enabled = True
+
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def register_gauge(self, name, fn):
+        """Register a callable evaluated at export time, e.g. a cache hit ratio."""
+        with self._lock:
+            self._gauges[name] = fn
+
+    def _gauge_values(self):
+        values = {}
+        for name, fn in list(self._gauges.items()):
+            try:
+                values[name] = float(fn())
+            except Exception as e:
+                logger.warning("Gauge %s failed: %s", name, str(e))
+        return values
+
+    def render_prometheus(self):
+        """Return every metric in the Prometheus text exposition format."""
+        def fmt(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+        lines = []
+        typed = set()
+
+        def declare(name, kind):
+            # One TYPE line per metric family, before its first sample
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        for (name, labels), h in histograms:
+            declare(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(h.buckets, h.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{fmt(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_bucket{fmt(labels, [('le', '+Inf')])} {h.count}")
+            lines.append(f"{name}_sum{fmt(labels)} {h.sum}")
+            lines.append(f"{name}_count{fmt(labels)} {h.count}")
+        for (name, labels), value in counters:
+            declare(name, "counter")
+            lines.append(f"{name}{fmt(labels)} {value}")
+        for name, value in sorted(self._gauge_values().items()):
+            declare(name, "gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self):
+        """Return a JSON-serializable snapshot of every metric."""
+        with self._lock:
+            histograms = [
+                {"name": name, "labels": dict(labels), "count": h.count, "sum": h.sum,
+                 "buckets": dict(zip([str(b) for b in h.buckets] + ["+Inf"], h.counts))}
+                for (name, labels), h in sorted(self._histograms.items())
+            ]
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self._counters.items())]
+        return {"timestamp": time.time(), "histograms": histograms, "counters": counters,
+                "gauges": self._gauge_values()}
+
+class NoOpRegistry:
+    """Registry used when metrics are disabled; every method does nothing."""
+
+    enabled = False
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        pass
+
+    def inc(self, name, value=1, **labels):
+        pass
+
+    def register_gauge(self, name, fn):
+        pass
+
+    def render_prometheus(self):
+        return ""
+
+    def to_dict(self):
+        return {}
+
+_registry = NoOpRegistry()
+_dump_thread = None
+
+def configure(enabled):
+    """Switch metrics collection on or off for the whole process."""
+    global _registry
+    if enabled and not _registry.enabled:
+        _registry = MetricsRegistry()
+    elif not enabled:
+        _registry = NoOpRegistry()
+
+def enabled():
+    return _registry.enabled
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    _registry.observe(name, value, buckets, **labels)
+
+def inc(name, value=1, **labels):
+    _registry.inc(name, value, **labels)
+
+def register_gauge(name, fn):
+    _registry.register_gauge(name, fn)
+
+def render_prometheus():
+    return _registry.render_prometheus()
+
+def to_dict():
+    return _registry.to_dict()
+
+def configure_from_env():
+    """Apply PSU_METRICS, PSU_METRICS_JSON and PSU_METRICS_INTERVAL from the environment."""
+    global _dump_thread
+    if os.getenv("PSU_METRICS") == "1":
+        configure(True)
+    path = os.getenv("PSU_METRICS_JSON")
+    if enabled() and path and _dump_thread is None:
+        _dump_thread = start_json_dump(path, float(os.getenv("PSU_METRICS_INTERVAL", "15")))
+
+def start_json_dump(path, interval=15.0):
+    """Write a JSON snapshot to path every interval seconds from a daemon thread."""
+    def dump():
+        while True:
+            time.sleep(interval)
+            try:
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(to_dict(), f)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning("Metrics dump to %s failed: %s", path, str(e))
+
+    thread = threading.Thread(target=dump, name="metrics-dump", daemon=True)
+    thread.start()
+    return thread
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Record per-stage timings, document counts and token counts from chain callbacks.
+
+    Stages: the whole chain, prompt assembly, each retriever (labelled by
+    class name, e.g. HybridRetriever, VectorStoreRetriever, BM25IndexRetriever)
+    and the LLM call, including its time to first token when streaming. The
+    query embedding call, which has no callback of its own, is recorded as
+    the "embedding" stage by src.embeddings.CachedEmbeddings.
+    """
+
+    def __init__(self, count_tokens):
+        self.count_tokens = count_tokens
+        self._runs: Dict[UUID, Any] = {}
+
+    def _start(self, run_id, stage, name):
+        self._runs[run_id] = [stage, name, time.perf_counter(), False]
+
+    def _end(self, run_id, error=False):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return None
+        stage, name, start, _ = run
+        observe("psu_stage_seconds", time.perf_counter() - start, stage=stage, component=name)
+        if error:
+            inc("psu_stage_errors_total", stage=stage, component=name)
+        return run
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get("name") or ""
+        if parent_run_id is None:
+            self._start(run_id, "chain", name or "chain")
+        elif "PromptTemplate" in name:
+            self._start(run_id, "prompt", name)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=True)
+
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs):
+        self._start(run_id, "retriever", kwargs.get("name") or "retriever")
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        run = self._end(run_id)
+        if run is not None:
+            observe("psu_retrieved_documents", len(documents), COUNT_BUCKETS, component=run[1])
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=True)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, "llm", kwargs.get("name") or "llm")
+        observe("psu_prompt_tokens", sum(self.count_tokens(p) for p in prompts), COUNT_BUCKETS)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        run = self._runs.get(run_id)
+        if run is not None and not run[3]:
+            run[3] = True
+            observe("psu_llm_time_to_first_token_seconds", time.perf_counter() - run[2])
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        if self._end(run_id) is not None:
+            completion = "".join(g.text for generations in response.generations for g in generations)
+            observe("psu_completion_tokens", self.count_tokens(completion), COUNT_BUCKETS)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=True)
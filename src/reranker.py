@@ -0,0 +1,111 @@
+"""Second-stage reranking of the fused hybrid results with a cross-encoder.
+
+The hybrid retriever fetches a wide candidate pool; RerankingRetriever
+scores (query, chunk) pairs with a small local cross-encoder and keeps only
+the best top_n, so the prompt carries fewer, better chunks. Candidates are
+scored in fused order a batch at a time, and scoring stops early once a
+whole batch falls below score_threshold. Scores are cached per (query,
+chunk id).
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import PrivateAttr
+from src.embeddings import normalize_query
+from src import metrics
+
+class CrossEncoderReranker:
+    """In-process CPU cross-encoder built on sentence-transformers."""
+
+    def __init__(self, model_name="cross-encoder/ms-marco-MiniLM-L-6-v2", device="cpu", batch_size=32):
+        # Imported here so the default configuration never pays for loading torch
+        from sentence_transformers import CrossEncoder
+
+        self.model = CrossEncoder(model_name, device=device)
+        self.batch_size = batch_size
+
+    def score(self, query, texts):
+        """Return one relevance score per text; higher is more relevant."""
+        if not texts:
+            return []
+        scores = self.model.predict([(query, text) for text in texts], batch_size=self.batch_size,
+                                    show_progress_bar=False)
+        return [float(s) for s in scores]
+
+def _chunk_key(doc):
+    return doc.metadata.get("chunk_id") or doc.page_content
+
+class RerankingRetriever(BaseRetriever):
+    """Rerank a base retriever's candidates and keep the top_n.
+
+    Candidates are scored batch_size at a time in the base ranking's order.
+    When score_threshold is set, documents scoring below it are dropped
+    (the best one is always kept), and no further batches are scored once a
+    batch, the first included, has no document above it.
+    """
+
+    base: BaseRetriever
+    reranker: Any
+    top_n: int = 4
+    score_threshold: Optional[float] = None
+    batch_size: int = 8
+    cache_size: int = 4096
+    _cache: Any = PrivateAttr(default_factory=OrderedDict)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    def _cached_scores(self, query_key, docs):
+        """Return the cached scores for docs, None where a score is missing."""
+        with self._lock:
+            scores = []
+            for doc in docs:
+                key = (query_key, _chunk_key(doc))
+                score = self._cache.get(key)
+                if score is not None:
+                    self._cache.move_to_end(key)
+                scores.append(score)
+            return scores
+
+    def _store_scores(self, query_key, docs, scores):
+        with self._lock:
+            for doc, score in zip(docs, scores):
+                self._cache[(query_key, _chunk_key(doc))] = score
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _score(self, query, docs):
+        query_key = normalize_query(query)
+        scores = self._cached_scores(query_key, docs)
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            fresh = self.reranker.score(query, [docs[i].page_content for i in missing])
+            self._store_scores(query_key, [docs[i] for i in missing], fresh)
+            for i, score in zip(missing, fresh):
+                scores[i] = score
+        metrics.inc("psu_rerank_pairs_total", len(docs) - len(missing), cached="true")
+        metrics.inc("psu_rerank_pairs_total", len(missing), cached="false")
+        return scores
+
+    def rerank(self, query, candidates):
+        """Return the best top_n candidates by cross-encoder score."""
+        scored = []
+        for start in range(0, len(candidates), self.batch_size):
+            batch = candidates[start:start + self.batch_size]
+            scores = self._score(query, batch)
+            scored.extend(zip(scores, range(start, start + len(batch)), batch))
+            if self.score_threshold is not None and max(scores) < self.score_threshold:
+                metrics.inc("psu_rerank_early_exit_total")
+                break
+        # Ties keep the base ranking's order
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        kept = [doc for score, _, doc in scored[:self.top_n]
+                if self.score_threshold is None or score >= self.score_threshold]
+        return kept or [doc for _, _, doc in scored[:1]]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        candidates = self.base.invoke(query, {"callbacks": run_manager.get_child()})
+        return self.rerank(query, candidates)
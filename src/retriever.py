@@ -1,33 +1,149 @@
-import os
-from langchain.retrievers import EnsembleRetriever, BM25Retriever
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceInferenceAPIEmbeddings
-
-def create_embedding_model(api_key, model_name="BAAI/bge-base-en-v1.5"):
-    """Create an embedding model instance."""
-    return HuggingFaceInferenceAPIEmbeddings(api_key=api_key, model_name=model_name)
-
-def create_vector_store(chunks, embeddings, persist_directory):
-    """Create or load a Chroma vector store."""
-    if os.path.exists(persist_directory) and os.listdir(persist_directory):
-        return Chroma(persist_directory=persist_directory, embedding_function=embeddings)
-    
-    return Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings,
-        persist_directory=persist_directory
-    )
-
-def setup_retrievers(vector_store, chunks):
-    """Set up and return ensemble retriever using vector search and langchain's BM25."""
-    kb_retriever = vector_store.as_retriever(search_kwargs={"k": 5})  # Vector search
-    # BM25
-    bm25 = BM25Retriever.from_documents(chunks)
-    bm25.k = 5
-    # Create ensemble with both retrievers
-    ensemble = EnsembleRetriever(
-        retrievers=[kb_retriever, bm25], 
-        weights=[0.5, 0.5]
-    )
-    
-    return ensemble
+import os
+import asyncio
+from typing import List, Optional
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from src.bm25_index import BM25IndexRetriever
+from src.dense_index import NumpyDenseRetriever
+from src.reranker import RerankingRetriever
+from src.embeddings import LocalEmbeddings, InferenceEmbeddings, CachedEmbeddings
+from src.transport import get_transport
+
+# Shared pool for running dense and sparse retrieval side by side
+_retrieval_executor = ContextThreadPoolExecutor(max_workers=8, thread_name_prefix="retrieve")
+
+def create_embedding_model(api_key, model_name="BAAI/bge-base-en-v1.5", backend="api", cache_size=1024):
+    """Create an embedding model instance.
+
+    backend is "api" for the HuggingFace Inference API or "local" for the
+    in-process sentence-transformers engine. API requests share the pooled,
+    retrying transport with the LLM. Query embeddings are LRU-cached.
+    """
+    if backend == "local":
+        embeddings = LocalEmbeddings(model_name=model_name)
+    elif backend == "api":
+        embeddings = InferenceEmbeddings(model_name, get_transport(api_key))
+    else:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+    return CachedEmbeddings(embeddings, max_size=cache_size) if cache_size else embeddings
+
+def check_embedding_dimension(vector_store, embeddings):
+    """Raise ValueError if the embeddings don't match the vectors already in the store."""
+    dimension = getattr(embeddings, "dimension", None)
+    if dimension is None:
+        return
+    stored = vector_store._collection.get(limit=1, include=["embeddings"])["embeddings"]
+    if stored is None or len(stored) == 0:
+        return
+    if len(stored[0]) != dimension:
+        raise ValueError(
+            f"Embedding dimension {dimension} does not match the stored collection ({len(stored[0])}). "
+            "Rebuild the vector store or pick a model with the same dimension."
+        )
+
+def open_vector_store(embeddings, persist_directory):
+    """Open the Chroma vector store in persist_directory, creating an empty one if needed."""
+    # Imported here so importing the backend does not load langchain_community and chromadb
+    from langchain_community.vectorstores import Chroma
+    return Chroma(persist_directory=persist_directory, embedding_function=embeddings)
+
+def create_vector_store(chunks, embeddings, persist_directory):
+    """Create or load a Chroma vector store."""
+    from langchain_community.vectorstores import Chroma
+    if os.path.exists(persist_directory) and os.listdir(persist_directory):
+        return Chroma(persist_directory=persist_directory, embedding_function=embeddings)
+    
+    return Chroma.from_documents(
+        documents=chunks,
+        embedding=embeddings,
+        persist_directory=persist_directory
+    )
+
+def weighted_rrf(doc_lists, weights, c=60, id_key=None):
+    """Fuse ranked document lists with weighted reciprocal rank fusion.
+
+    Produces the same ordering as langchain's EnsembleRetriever: documents are
+    deduplicated by page content (or metadata[id_key]) in first-seen order and
+    sorted stably by the summed weight / (rank + c).
+    """
+    positions = {}
+    unique_docs = []
+    doc_index = []
+    contributions = []
+    for docs, weight in zip(doc_lists, weights):
+        for rank, doc in enumerate(docs, start=1):
+            key = doc.page_content if id_key is None else doc.metadata[id_key]
+            if key not in positions:
+                positions[key] = len(unique_docs)
+                unique_docs.append(doc)
+            doc_index.append(positions[key])
+            contributions.append(weight / (rank + c))
+    if not unique_docs:
+        return []
+    scores = np.bincount(doc_index, weights=contributions, minlength=len(unique_docs))
+    return [unique_docs[i] for i in np.argsort(-scores, kind="stable")]
+
+class HybridRetriever(BaseRetriever):
+    """Run dense and sparse retrievers concurrently and fuse them with weighted RRF."""
+
+    retrievers: List[BaseRetriever]
+    weights: List[float]
+    c: int = 60
+    id_key: Optional[str] = None
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        futures = [
+            _retrieval_executor.submit(
+                retriever.invoke, query, {"callbacks": run_manager.get_child(tag=f"retriever_{i + 1}")}
+            )
+            for i, retriever in enumerate(self.retrievers)
+        ]
+        return weighted_rrf([f.result() for f in futures], self.weights, self.c, self.id_key)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        doc_lists = await asyncio.gather(*[
+            retriever.ainvoke(query, {"callbacks": run_manager.get_child(tag=f"retriever_{i + 1}")})
+            for i, retriever in enumerate(self.retrievers)
+        ])
+        return weighted_rrf(doc_lists, self.weights, self.c, self.id_key)
+
+def setup_retrievers(vector_store, chunks, bm25_index=None, k=5, weights=(0.5, 0.5), dense_index=None,
+                     reranker=None, rerank_k=10, rerank_top_n=4, rerank_threshold=None):
+    """Set up and return a hybrid retriever using vector search and BM25.
+
+    Uses the compiled BM25 index when one is given, otherwise falls back to langchain's BM25.
+    Dense search runs on the in-memory dense_index when one is given, otherwise through Chroma.
+    With a reranker, each side fetches rerank_k candidates instead of k and the
+    fused pool is cut to the reranker's best rerank_top_n.
+    """
+    if reranker is not None:
+        k = rerank_k
+    # Vector search
+    if dense_index is not None:
+        kb_retriever = NumpyDenseRetriever(embeddings=vector_store.embeddings, index=dense_index, k=k)
+    else:
+        kb_retriever = vector_store.as_retriever(search_kwargs={"k": k})
+    # BM25
+    if bm25_index is not None:
+        bm25 = BM25IndexRetriever(index=bm25_index, docs=chunks, k=k)
+    else:
+        from langchain.retrievers import BM25Retriever
+        bm25 = BM25Retriever.from_documents(chunks)
+        bm25.k = k
+    # Run both retrievers concurrently and fuse their rankings
+    hybrid = HybridRetriever(
+        retrievers=[kb_retriever, bm25],
+        weights=list(weights)
+    )
+    if reranker is not None:
+        return RerankingRetriever(base=hybrid, reranker=reranker, top_n=rerank_top_n,
+                                  score_threshold=rerank_threshold)
+    
+    return hybrid
@@ -0,0 +1,248 @@
+"""Async HTTP API over the shared PSUChatBackend.
+
+Run with:
+    uvicorn src.server:app
+
+Endpoints:
+    GET  /health        -> {"status": "ok"}
+    POST /query         {"query": "..."} -> {"response": "..."}
+    POST /query/stream  {"query": "..."} -> chunked text/plain response
+    GET  /metrics       -> Prometheus text format (empty unless PSU_METRICS=1)
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+from src.embeddings import normalize_query
+from src import metrics
+
+logger = logging.getLogger(__name__)
+
+class Saturated(Exception):
+    """Raised when the service is at its concurrency limit and must shed load."""
+
+class MicroBatcher:
+    """Collect queries arriving within a short window and answer them as one batch.
+
+    Identical in-flight queries (after normalization) share a single upstream
+    call. At most ``max_pending`` distinct queries may be queued or running;
+    beyond that ``submit`` raises Saturated.
+    """
+
+    def __init__(self, backend, batch_window_ms=10, max_batch_size=16,
+                 max_concurrent_batches=4, max_pending=64):
+        self.backend = backend
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.max_pending = max_pending
+        self.coalesced = 0
+        self.batches = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent_batches)
+        self._inflight = {}
+        self._queue = []
+        self._flush_handle = None
+
+    async def submit(self, query):
+        """Return (success, response) for the query once its batch completes."""
+        key = normalize_query(query)
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+        if len(self._inflight) >= self.max_pending:
+            raise Saturated()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[key] = future
+        self._queue.append((key, query, future))
+        if len(self._queue) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._queue = self._queue[:self.max_batch_size], self._queue[self.max_batch_size:]
+        if self._queue:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._flush)
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        async with self._semaphore:
+            self.batches += 1
+            try:
+                results = await self.backend.agenerate_responses([query for _, query, _ in batch])
+            except Exception as e:
+                logger.error("Batch failed: %s", str(e), exc_info=True)
+                results = [(False, f"Error generating response: {str(e)}")] * len(batch)
+        for (key, _, future), result in zip(batch, results):
+            self._inflight.pop(key, None)
+            if not future.done():
+                future.set_result(result)
+
+async def _read_json(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+async def _send_json(send, status, payload):
+    body = json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+def create_app(backend=None, batch_window_ms=10, max_batch_size=16, max_concurrent_batches=4,
+               max_pending=64, max_streams=16, init_retry_seconds=30):
+    """Create the ASGI application.
+
+    When no backend is given, the process-wide shared backend is initialized
+    at startup; if that fails, requests retry the initialization at most once
+    every ``init_retry_seconds`` and get 503 until it succeeds.
+    ``max_pending`` and ``max_streams`` bound queued queries and open
+    streams; requests beyond them get 429.
+    """
+    state = {"backend": backend, "batcher": None, "streams": 0, "shared": backend is None,
+             "last_init_attempt": 0.0}
+    startup_lock = asyncio.Lock()
+
+    async def startup():
+        async with startup_lock:
+            if state["batcher"] is None:
+                await _initialize()
+
+    async def _initialize():
+        if state["shared"]:
+            from src.backend_config import get_shared_backend
+            state["last_init_attempt"] = time.monotonic()
+            backend, success, message = await asyncio.to_thread(get_shared_backend)
+            if not success:
+                logger.error("Backend initialization failed: %s", message)
+            state["backend"] = backend
+        if state["batcher"] is None:
+            state["batcher"] = MicroBatcher(state["backend"], batch_window_ms, max_batch_size,
+                                            max_concurrent_batches, max_pending)
+        else:
+            state["batcher"].backend = state["backend"]
+
+    async def retry_initialization():
+        """Initialize the shared backend again if it failed and the retry interval has passed."""
+        async with startup_lock:
+            if state["backend"].chain or time.monotonic() - state["last_init_attempt"] < init_retry_seconds:
+                return
+            logger.info("Retrying backend initialization")
+            await _initialize()
+
+    async def lifespan(receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await startup()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def query(receive, send):
+        payload = await _read_json(receive)
+        text = payload.get("query")
+        if not isinstance(text, str) or not text.strip():
+            return await _send_json(send, 400, {"error": "Missing 'query'"})
+        try:
+            success, response = await state["batcher"].submit(text)
+        except Saturated:
+            metrics.inc("psu_http_rejected_total", endpoint="query")
+            return await _send_json(send, 429, {"error": "Too many requests, try again shortly"})
+        if not success:
+            return await _send_json(send, 500, {"error": response})
+        await _send_json(send, 200, {"response": response})
+
+    async def query_stream(receive, send):
+        payload = await _read_json(receive)
+        text = payload.get("query")
+        if not isinstance(text, str) or not text.strip():
+            return await _send_json(send, 400, {"error": "Missing 'query'"})
+        if state["streams"] >= max_streams:
+            metrics.inc("psu_http_rejected_total", endpoint="query_stream")
+            return await _send_json(send, 429, {"error": "Too many requests, try again shortly"})
+
+        state["streams"] += 1
+        try:
+            chunks = state["backend"].stream_response(text)
+            first = await asyncio.to_thread(next, chunks, None)
+        except Exception as e:
+            state["streams"] -= 1
+            return await _send_json(send, 500, {"error": f"Error generating response: {str(e)}"})
+
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/plain; charset=utf-8")],
+            })
+            chunk = first
+            while chunk is not None:
+                await send({"type": "http.response.body", "body": chunk.encode("utf-8"), "more_body": True})
+                chunk = await asyncio.to_thread(next, chunks, None)
+        except Exception as e:
+            logger.error("Stream aborted: %s", str(e))
+        finally:
+            state["streams"] -= 1
+        await send({"type": "http.response.body", "body": b""})
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await lifespan(receive, send)
+        if scope["type"] != "http":
+            return
+        if state["batcher"] is None:
+            await startup()
+        if not state["backend"].chain and state["shared"]:
+            await retry_initialization()
+        backend = state["backend"]
+        route = (scope["method"], scope["path"])
+        if route == ("GET", "/metrics"):
+            body = metrics.render_prometheus().encode("utf-8")
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/plain; version=0.0.4")],
+            })
+            return await send({"type": "http.response.body", "body": body})
+        if route == ("GET", "/health"):
+            return await _send_json(send, 200, {"status": "ok" if backend.chain else "initializing"})
+        if not backend.chain:
+            return await _send_json(send, 503, {"error": "System not initialized"})
+        if route == ("POST", "/query"):
+            return await query(receive, send)
+        if route == ("POST", "/query/stream"):
+            return await query_stream(receive, send)
+        await _send_json(send, 404, {"error": "Not found"})
+
+    app.state = state  # Exposed for inspection by load tests
+    return app
+
+app = create_app(
+    batch_window_ms=float(os.getenv("BATCH_WINDOW_MS", "10")),
+    max_batch_size=int(os.getenv("MAX_BATCH_SIZE", "16")),
+    max_concurrent_batches=int(os.getenv("MAX_CONCURRENT_BATCHES", "4")),
+    max_pending=int(os.getenv("MAX_PENDING_QUERIES", "64")),
+    max_streams=int(os.getenv("MAX_STREAMS", "16")),
+    init_retry_seconds=float(os.getenv("INIT_RETRY_SECONDS", "30")),
+)
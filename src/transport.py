@@ -0,0 +1,281 @@
+"""Shared HTTP transport for the HuggingFace inference clients.
+
+The LLM and embedding clients send every request through one process-wide
+InferenceTransport (see get_transport), which provides:
+
+- keep-alive connection pooling through a single requests.Session,
+- connect and read timeouts on every request,
+- bounded concurrency and token-bucket rate limiting,
+- retries with exponential backoff and full jitter on connection errors,
+  timeouts, 429 and 5xx responses (honouring Retry-After),
+- a circuit breaker that fails fast while the upstream keeps failing,
+- optional hedged requests: when an idempotent request has not answered
+  within hedge_after_ms, a second copy is sent and the first reply wins.
+
+    HF_INFERENCE_URL=http://127.0.0.1:8081   send requests elsewhere, e.g. to
+                                             benchmarks/mock_inference_server.py
+    HF_HEDGE_AFTER_MS=500                    enable hedging after 500 ms
+"""
+import os
+import time
+import random
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import requests
+from requests.adapters import HTTPAdapter
+from src import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INFERENCE_URL = "https://api-inference.huggingface.co"
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+class TransportError(Exception):
+    """Raised when an upstream request fails.
+
+    retryable marks failures worth another attempt (connection errors,
+    timeouts, 429 and 5xx); retry_after is the server's requested delay.
+    """
+
+    def __init__(self, message, status=None, retryable=False, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+class CircuitOpenError(TransportError):
+    """Raised without contacting the upstream while the circuit breaker is open."""
+
+class TokenBucket:
+    """Rate limiter allowing rate requests per second with bursts of up to capacity."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Take one token, waiting up to timeout seconds; return False if none became available."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                delay = (1 - self._tokens) / self.rate
+            if deadline is not None and now + delay > deadline:
+                return False
+            time.sleep(delay)
+
+class CircuitBreaker:
+    """Opens after failure_threshold consecutive failures and rejects calls until
+    reset_timeout has passed, then lets a single trial call decide whether to close.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                logger.info("Circuit breaker closed")
+            self.state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning("Circuit breaker opened after %d failures", self._failures)
+                    metrics.inc("psu_http_circuit_opened_total")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def release(self):
+        """Give back a half-open trial that ended without reaching the upstream."""
+        with self._lock:
+            self._trial_in_flight = False
+
+class InferenceTransport:
+    """Pooled, rate-limited, retrying HTTP client for JSON inference endpoints."""
+
+    def __init__(self, token=None, base_url=None, pool_size=16, max_concurrency=8, rate_per_second=20.0,
+                 burst=40, connect_timeout=5.0, read_timeout=60.0, max_retries=3, backoff_base=0.5,
+                 backoff_max=8.0, hedge_after_ms=None, failure_threshold=5, reset_timeout=30.0,
+                 acquire_timeout=30.0):
+        self.base_url = (base_url or os.getenv("HF_INFERENCE_URL") or DEFAULT_INFERENCE_URL).rstrip("/")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.acquire_timeout = acquire_timeout
+        self.hedge_after = hedge_after_ms / 1000 if hedge_after_ms else None
+        self.rate_limiter = TokenBucket(rate_per_second, burst) if rate_per_second else None
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._hedge_executor = (ThreadPoolExecutor(max_workers=2 * max_concurrency, thread_name_prefix="hedge")
+                                if self.hedge_after else None)
+
+    def _open(self, path, payload, stream):
+        """Send one request and return the response with a concurrency slot held."""
+        if self.rate_limiter is not None and not self.rate_limiter.acquire(self.acquire_timeout):
+            raise TransportError("Timed out waiting for the rate limiter")
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise TransportError("Timed out waiting for a free upstream connection")
+        start = time.perf_counter()
+        try:
+            response = self.session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout,
+                                         stream=stream)
+        except requests.RequestException as e:
+            self._slots.release()
+            metrics.observe("psu_http_request_seconds", time.perf_counter() - start, outcome="error")
+            raise TransportError(f"Request to {path} failed: {e}", retryable=True) from e
+        metrics.observe("psu_http_request_seconds", time.perf_counter() - start, outcome=str(response.status_code))
+        if response.status_code >= 400:
+            try:
+                detail = response.text[:200]
+            finally:
+                response.close()
+                self._slots.release()
+            retry_after = response.headers.get("Retry-After")
+            raise TransportError(
+                f"{path} returned {response.status_code}: {detail}",
+                status=response.status_code,
+                retryable=response.status_code in RETRY_STATUSES,
+                retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+            )
+        return response
+
+    def _attempt(self, path, payload):
+        response = self._open(path, payload, stream=False)
+        try:
+            return response.json()
+        except ValueError as e:
+            raise TransportError(f"{path} returned invalid JSON", status=response.status_code) from e
+        finally:
+            response.close()
+            self._slots.release()
+
+    def _hedged_attempt(self, path, payload):
+        """Run one attempt, racing a second copy if the first is slower than hedge_after."""
+        primary = self._hedge_executor.submit(self._attempt, path, payload)
+        done, _ = wait([primary], timeout=self.hedge_after)
+        if done:
+            return primary.result()
+        metrics.inc("psu_http_hedged_total")
+        # The slower copy is left to finish in the background; its result is discarded
+        pending = [primary, self._hedge_executor.submit(self._attempt, path, payload)]
+        error = None
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+                try:
+                    return future.result()
+                except TransportError as e:
+                    error = e
+        raise error
+
+    def _backoff(self, attempt, retry_after=None):
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        return max(delay, retry_after) if retry_after else delay
+
+    def _with_retries(self, fn):
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                metrics.inc("psu_http_rejected_total")
+                raise CircuitOpenError("Inference upstream unavailable; circuit breaker is open")
+            try:
+                result = fn()
+            except TransportError as e:
+                if e.retryable:
+                    self.breaker.record_failure()
+                elif e.status is not None:
+                    # The upstream answered (e.g. 400), so it is healthy
+                    self.breaker.record_success()
+                else:
+                    self.breaker.release()
+                if not e.retryable or attempt == self.max_retries:
+                    raise
+                delay = self._backoff(attempt, e.retry_after)
+                logger.warning("Retrying in %.2fs after: %s", delay, str(e))
+                metrics.inc("psu_http_retries_total")
+                time.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+    def post(self, path, payload, hedge=True):
+        """POST payload as JSON to path and return the decoded JSON reply.
+
+        Only use hedge=True for idempotent requests: a hedged request may reach the upstream twice.
+        """
+        if hedge and self.hedge_after:
+            return self._with_retries(lambda: self._hedged_attempt(path, payload))
+        return self._with_retries(lambda: self._attempt(path, payload))
+
+    def stream(self, path, payload):
+        """POST payload and yield the non-empty lines of the streamed reply.
+
+        Retries only happen before the first byte arrives; a stream that
+        breaks midway raises TransportError.
+        """
+        response = self._with_retries(lambda: self._open(path, payload, stream=True))
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if line:
+                    yield line
+        except requests.RequestException as e:
+            self.breaker.record_failure()
+            raise TransportError(f"Stream from {path} interrupted: {e}", retryable=True) from e
+        finally:
+            response.close()
+            self._slots.release()
+
+_shared_transport = None
+_shared_transport_lock = threading.Lock()
+
+def get_transport(token=None):
+    """Return the process-wide transport, creating it on first use."""
+    global _shared_transport
+    with _shared_transport_lock:
+        if _shared_transport is None:
+            hedge_after_ms = os.getenv("HF_HEDGE_AFTER_MS")
+            _shared_transport = InferenceTransport(
+                token or os.getenv("HUGGINGFACEHUB_API_TOKEN"),
+                hedge_after_ms=float(hedge_after_ms) if hedge_after_ms else None,
+            )
+        return _shared_transport
@@ -0,0 +1,47 @@
+import asyncio
+import threading
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import RunnableLambda
+from src.backend_config import PSUChatBackend
+from src.cache import ResponseCache
+
+class ThreadRecordingEmbeddings(Embeddings):
+    """Records the thread of every embedding call."""
+
+    def __init__(self):
+        self.threads = set()
+
+    def embed_documents(self, texts):
+        self.threads.add(threading.get_ident())
+        return [[1.0, 0.0] if "cached" in text else [0.0, 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+def backend_with(chain, embeddings=None, tmp_path=None):
+    backend = PSUChatBackend(str(tmp_path / "chroma_db"), persist_response_cache=False)
+    backend.chain = chain
+    backend.response_cache = ResponseCache(embeddings)
+    return backend
+
+def test_batched_cache_calls_stay_off_the_event_loop(tmp_path):
+    embeddings = ThreadRecordingEmbeddings()
+    backend = backend_with(RunnableLambda(lambda query: f"answer to {query}"), embeddings, tmp_path)
+    backend.response_cache.put("cached question", "cached answer")
+    embeddings.threads.clear()
+
+    async def run():
+        results = await backend.agenerate_responses(["cached question", "new question"])
+        return results, threading.get_ident()
+
+    results, loop_thread = asyncio.run(run())
+    assert results == [(True, "cached answer"), (True, "answer to new question")]
+    assert embeddings.threads and loop_thread not in embeddings.threads
+    assert backend.response_cache.get("new question") == "answer to new question"
+
+def test_empty_streamed_answer_is_not_cached(tmp_path):
+    backend = backend_with(RunnableLambda(lambda query: ""), tmp_path=tmp_path)
+    assert "".join(backend.stream_response("question")) == ""
+    assert backend.response_cache.stats["entries"] == 0
+    success, response = backend.generate_response("question")
+    assert success and backend.response_cache.stats["entries"] == 0
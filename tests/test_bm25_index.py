@@ -0,0 +1,47 @@
+import os
+import numpy as np
+from langchain_core.documents import Document
+from rank_bm25 import BM25Okapi
+from src.bm25_index import BM25Index, default_tokenize
+
+TEXTS = [
+    "Submit the application form to the Registrar with two ID pictures",
+    "The Registrar issues the transcript of records within five working days",
+    "Pay the enrollment fee at the Cashier before submitting the form",
+    "Library cards are issued by the Library upon presentation of the registration form",
+    "Scholarship applicants submit the form and grades to the Office of Student Affairs",
+    "the the the form form",
+]
+QUERIES = ["submit form", "Registrar transcript", "Library card", "fee Cashier", "unknown words only", "the"]
+
+def chunks(texts=TEXTS):
+    return [Document(page_content=text) for text in texts]
+
+def test_scores_match_rank_bm25(tmp_path):
+    index = BM25Index.build(chunks(), str(tmp_path), "key")
+    reference = BM25Okapi([default_tokenize(text) for text in TEXTS])
+    for query in QUERIES:
+        tokens = default_tokenize(query)
+        np.testing.assert_allclose(index.get_scores(tokens), reference.get_scores(tokens))
+
+def test_top_k_matches_rank_bm25_get_top_n(tmp_path):
+    index = BM25Index.build(chunks(), str(tmp_path), "key")
+    reference = BM25Okapi([default_tokenize(text) for text in TEXTS])
+    for query in QUERIES:
+        tokens = default_tokenize(query)
+        expected = reference.get_top_n(tokens, TEXTS, n=3)
+        assert [TEXTS[i] for i in index.top_k(tokens, 3)] == expected
+
+def test_load_rejects_other_keys(tmp_path):
+    BM25Index.build(chunks(), str(tmp_path), "key")
+    assert BM25Index.load(str(tmp_path), "other") is None
+    assert BM25Index.load(str(tmp_path), "key") is not None
+
+def test_rebuild_leaves_mapped_index_intact(tmp_path):
+    old = BM25Index.build(chunks(), str(tmp_path), "old")
+    before = old.get_scores(["form"]).copy()
+    new = BM25Index.build(chunks(TEXTS[:3]), str(tmp_path), "new")
+    np.testing.assert_allclose(old.get_scores(["form"]), before)
+    assert new.n_docs == 3
+    assert BM25Index.load(str(tmp_path), "old") is None
+    assert len(os.listdir(tmp_path)) == 1
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+from src import cache as cache_module
+from src.cache import ResponseCache
+
+class KeywordEmbeddings(Embeddings):
+    """Embeds texts by which of a few keywords they contain."""
+
+    KEYWORDS = ("registrar", "transcript", "library", "fee")
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        return [float(word in text.lower()) for word in self.KEYWORDS] + [0.01]
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    return now
+
+def test_exact_hit_ignores_case_and_spacing():
+    cache = ResponseCache()
+    cache.put("Where is the  Registrar?", "Building A")
+    assert cache.get("where is the registrar?") == "Building A"
+    assert cache.stats["exact_hits"] == 1
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResponseCache(ttl_seconds=60)
+    cache.put("question", "answer")
+    clock[0] += 59
+    assert cache.get("question") == "answer"
+    clock[0] += 2
+    assert cache.get("question") is None
+    assert cache.stats["misses"] == 1
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+def test_semantic_hit_above_threshold_only():
+    cache = ResponseCache(KeywordEmbeddings(), similarity_threshold=0.95)
+    cache.put("How do I get my transcript?", "Ask the Registrar")
+    assert cache.get("transcript request please") == "Ask the Registrar"
+    assert cache.get("library hours") is None
+    assert cache.stats["semantic_hits"] == 1
+
+def test_persisted_cache_reloads_only_with_same_fingerprint(tmp_path):
+    path = str(tmp_path / "responses.npz")
+    cache = ResponseCache(KeywordEmbeddings(), persist_path=path, fingerprint="v1")
+    cache.put("transcript", "Registrar")
+    cache.close()
+
+    reloaded = ResponseCache(KeywordEmbeddings(), persist_path=path, fingerprint="v1")
+    assert reloaded.get("transcript") == "Registrar"
+    assert reloaded.get("my transcript") == "Registrar"
+    assert ResponseCache(persist_path=path, fingerprint="v2").get("transcript") is None
+
+def test_clear_drops_entries():
+    cache = ResponseCache()
+    cache.put("a", "1")
+    cache.clear()
+    assert cache.get("a") is None
+    assert cache.stats["entries"] == 0
+
+def test_expired_best_match_falls_back_to_the_next_candidate(clock):
+    cache = ResponseCache(KeywordEmbeddings(), similarity_threshold=0.9, ttl_seconds=60)
+    cache.put("registrar transcript", "old answer")
+    clock[0] += 50
+    cache.put("transcript at the registrar office", "fresh answer")
+    clock[0] += 20
+    # Both entries embed identically and the older, expired one is tried first
+    assert cache.get("registrar transcript please") == "fresh answer"
+    assert "registrar transcript" not in cache._entries
+    assert cache.stats["semantic_hits"] == 1
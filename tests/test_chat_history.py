@@ -0,0 +1,58 @@
+import gc
+import os
+from src.chat_history import ChatHistory
+
+def filled(turns, **options):
+    history = ChatHistory("session", max_messages=6, window_size=4, page_size=4, **options)
+    for i in range(turns):
+        history.append("user", f"question {i}")
+        history.append("assistant", f"answer {i}")
+    return history
+
+def test_spills_beyond_cap_and_pages_back():
+    history = filled(10)
+    assert len(history) == 20 and len(history._messages) == 6
+    assert [m["id"] for m in history.window()] == [16, 17, 18, 19]
+    assert history.has_earlier()
+    history.load_earlier()
+    history.load_earlier()
+    window = history.window()
+    assert [m["id"] for m in window] == list(range(8, 20))
+    assert window[0]["content"] == "question 4"
+    history.close()
+
+def test_only_past_messages_are_cached():
+    history = filled(3)
+    newest = history.window()[-1]
+    past = history.window()[0]
+    assert history.html(newest) == '<div class="last-message">answer 2</div>'
+    assert history.html(past) is history.html(past)
+    assert newest["id"] not in history._html
+    history.append("user", "next")
+    assert history.html(newest) == '<div class="">answer 2</div>'
+    history.close()
+
+def test_close_deletes_the_spill_file():
+    history = filled(10)
+    path = history.db_path
+    assert os.path.exists(path)
+    history.close()
+    assert not os.path.exists(path)
+    assert len(history) == 0 and history.window() == []
+
+def test_dropped_session_deletes_the_spill_file():
+    history = filled(10)
+    path = history.db_path
+    del history
+    gc.collect()
+    assert not os.path.exists(path)
+
+def test_shared_file_keeps_other_sessions(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    first = filled(10, db_path=path)
+    second = ChatHistory("other", db_path=path, max_messages=2)
+    for i in range(5):
+        second.append("user", str(i))
+    first.close()
+    assert [m["content"] for m in second.window()] == ["0", "1", "2", "3", "4"]
+    second.close()
@@ -0,0 +1,50 @@
+from langchain_core.documents import Document
+from src.context import merge_spans, pack_context
+
+def located(text, start, page=0, source="a.pdf"):
+    return Document(page_content=text, metadata={"source": source, "page": page, "start_index": start})
+
+def count_words(text):
+    return len(text.split())
+
+def test_overlapping_offsets_merge_into_one_span():
+    text = "0123456789abcdefghij"
+    spans = merge_spans([located(text[5:15], 5), located(text[0:10], 0)])
+    assert spans == [(text[0:15], 0)]
+
+def test_adjacent_offsets_merge_and_gaps_do_not():
+    spans = merge_spans([located("abc", 0), located("def", 3), located("xyz", 10)])
+    assert spans == [("abcdef", 0), ("xyz", 2)]
+
+def test_different_pages_are_not_merged():
+    spans = merge_spans([located("abc", 0, page=1), located("def", 3, page=2)])
+    assert spans == [("abc", 0), ("def", 1)]
+
+def test_duplicates_are_dropped():
+    doc = Document(page_content="same text", metadata={"chunk_id": "1"})
+    copy = Document(page_content="same text")
+    assert merge_spans([doc, copy, Document(page_content="other")]) == [("same text", 0), ("other", 2)]
+
+def test_text_overlap_merges_chunks_without_offsets():
+    shared = "the registrar office is open from eight"
+    left = Document(page_content="Requests go to the counter; " + shared)
+    right = Document(page_content=shared + " to five on weekdays.")
+    spans = merge_spans([right, left])
+    assert spans == [("Requests go to the counter; " + shared + " to five on weekdays.", 0)]
+
+def test_short_coincidental_overlap_is_not_merged():
+    spans = merge_spans([Document(page_content="ends with form"), Document(page_content="form starts here")])
+    assert len(spans) == 2
+
+def test_spans_keep_best_rank_order():
+    spans = merge_spans([located("late", 100), located("early", 0), located("earlier", 0, source="b.pdf")])
+    assert [rank for _, rank in spans] == [0, 1, 2]
+
+def test_pack_context_respects_budget():
+    docs = [Document(page_content="one two three"), Document(page_content="four five"),
+            Document(page_content="six seven eight nine")]
+    assert pack_context(docs, 5, count_words) == "one two three\n\nfour five"
+
+def test_pack_context_truncates_an_oversized_first_span():
+    context = pack_context([Document(page_content="a b c d e f g h")], 4, count_words)
+    assert 0 < len(context) < len("a b c d e f g h")
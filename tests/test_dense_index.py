@@ -0,0 +1,86 @@
+import os
+import hashlib
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from src.dense_index import DenseIndex, NumpyDenseRetriever
+
+DIMENSION = 32
+
+class SeededEmbeddings(Embeddings):
+    """Deterministic random unit vectors keyed by the text."""
+
+    def _vector(self, text):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(DIMENSION)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts):
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+@pytest.fixture
+def vector_store(tmp_path):
+    from langchain_community.vectorstores import Chroma
+
+    docs = [Document(page_content=f"chunk {i} about service {i % 17}", metadata={"n": i}) for i in range(300)]
+    store = Chroma.from_documents(docs, SeededEmbeddings(), persist_directory=str(tmp_path / "chroma"))
+    yield store
+    store._client.close()
+
+def test_search_is_exact(vector_store, tmp_path):
+    index = DenseIndex.export(vector_store, str(tmp_path / "dense"), "key")
+    queries = np.random.default_rng(1).standard_normal((20, DIMENSION)).astype(np.float32)
+    indices, scores = index.search(queries, 5)
+    unit = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    expected = np.argsort(-(unit @ index.vectors.T), axis=1, kind="stable")[:, :5]
+    np.testing.assert_array_equal(indices, expected)
+    assert np.all(np.diff(scores, axis=1) <= 0)
+
+def test_recall_matches_chroma(vector_store, tmp_path):
+    index = DenseIndex.export(vector_store, str(tmp_path / "dense"), "key")
+    retriever = NumpyDenseRetriever(embeddings=vector_store.embeddings, index=index, k=5)
+    chroma = vector_store.as_retriever(search_kwargs={"k": 5})
+    queries = [f"how do I request service {i}?" for i in range(30)]
+    recalls = []
+    for query in queries:
+        expected = {doc.page_content for doc in retriever.invoke(query)}
+        actual = {doc.page_content for doc in chroma.invoke(query)}
+        recalls.append(len(expected & actual) / len(expected))
+    assert np.mean(recalls) >= 0.95
+
+def test_reexport_publishes_a_new_directory(vector_store, tmp_path):
+    index_dir = str(tmp_path / "dense")
+    old = DenseIndex.export(vector_store, index_dir, "old")
+    before = old.vectors.copy()
+    DenseIndex.export(vector_store, index_dir, "new", dtype="float16")
+    np.testing.assert_array_equal(old.vectors, before)
+    assert DenseIndex.load(index_dir, "old") is None
+    assert DenseIndex.load(index_dir, "new").vectors.dtype == np.float16
+    assert len(os.listdir(index_dir)) == 1
+
+@pytest.mark.parametrize("dtype", ["int8", "float16"])
+def test_quantized_rebuild_leaves_mapped_index_intact(tmp_path, dtype):
+    from src.dense_index import QuantizedDenseIndex
+
+    index_dir = str(tmp_path / "quantized")
+    rng = np.random.default_rng(2)
+    old_vectors = rng.standard_normal((200, DIMENSION)).astype(np.float32)
+    records = [{"page_content": f"chunk {i}", "metadata": {}} for i in range(200)]
+    QuantizedDenseIndex.build(old_vectors, records, index_dir, "old", dtype)
+    old = QuantizedDenseIndex.load(index_dir, "old")
+    queries = old_vectors[:10]
+    before = old.search(queries, 5)
+    np.testing.assert_array_equal(before[0][:, 0], np.arange(10))
+
+    QuantizedDenseIndex.build(rng.standard_normal((50, DIMENSION)).astype(np.float32), records[:50],
+                              index_dir, "new", dtype)
+    after = old.search(queries, 5)
+    np.testing.assert_array_equal(after[0], before[0])
+    np.testing.assert_allclose(after[1], before[1])
+    assert QuantizedDenseIndex.load(index_dir, "old") is None
+    assert len(QuantizedDenseIndex.load(index_dir, "new")) == 50
+    assert len(os.listdir(index_dir)) == 1
@@ -0,0 +1,30 @@
+from langchain_core.embeddings import Embeddings
+from src.embeddings import CachedEmbeddings
+
+class CountingEmbeddings(Embeddings):
+    """Embeds a text as [its length]; records every text sent to the model."""
+
+    def __init__(self):
+        self.texts = []
+
+    def embed_documents(self, texts):
+        self.texts.extend(texts)
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+def test_embed_queries_batches_misses_and_counts_each_lookup_once():
+    base = CountingEmbeddings()
+    cached = CachedEmbeddings(base)
+    cached.embed_query("a")
+    assert cached.embed_queries(["a", "bb", "BB ", "ccc"]) == [[1.0], [2.0], [2.0], [3.0]]
+    assert base.texts == ["a", "bb", "ccc"]
+    assert (cached.hits, cached.misses) == (1, 4)
+
+def test_embed_queries_larger_than_the_cache():
+    cached = CachedEmbeddings(CountingEmbeddings(), max_size=2)
+    texts = ["a", "bb", "ccc", "dddd"]
+    assert cached.embed_queries(texts) == [[1.0], [2.0], [3.0], [4.0]]
+    assert cached.hits == 0
+    assert list(cached._cache) == ["ccc", "dddd"]
@@ -0,0 +1,83 @@
+import threading
+import pytest
+from src import index_registry
+from src.index_registry import IndexRegistry
+
+class FakeBackend:
+    """Stands in for PSUChatBackend; fails to initialize collections named "broken*"."""
+
+    instances = []
+
+    def __init__(self, persist_directory, **options):
+        self.persist_directory = persist_directory
+        self.cache_directory = f"{persist_directory}_cache"
+        self.closed = False
+        FakeBackend.instances.append(self)
+
+    def initialize_system(self, pdf_path, llm=None, data_dir=None, embeddings=None):
+        if "broken" in self.persist_directory:
+            return False, "PDF file not found"
+        if "raises" in self.persist_directory:
+            raise RuntimeError("boom")
+        return True, "System initialized successfully!"
+
+    def generate_response(self, query):
+        return True, f"{self.persist_directory}: {query}"
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    FakeBackend.instances = []
+    monkeypatch.setattr(index_registry, "PSUChatBackend", FakeBackend)
+    registry = IndexRegistry(str(tmp_path), memory_budget_mb=12, collection_overhead_mb=6,
+                             embeddings=object(), llm=object())
+    for name in ("a", "b", "c", "broken", "raises"):
+        registry.register(name, pdf_path=f"{name}.pdf")
+    return registry
+
+def test_failed_loads_close_their_backend(registry):
+    success, message = registry.generate_response("broken", "q")
+    assert not success and "not found" in message
+    success, message = registry.generate_response("raises", "q")
+    assert not success and "boom" in message
+    assert [b.closed for b in FakeBackend.instances] == [True, True]
+    assert registry.loaded == []
+
+def test_least_recently_used_idle_collection_is_evicted(registry):
+    for name in ("a", "b", "a", "c"):
+        assert registry.generate_response(name, "q")[0]
+    assert registry.loaded == ["a", "c"]
+    assert registry.evictions == 1
+    assert [b.closed for b in FakeBackend.instances] == [False, True, False]
+
+def test_leased_collection_is_not_evicted(registry):
+    with registry.lease("a") as leased:
+        registry.generate_response("b", "q")
+        registry.generate_response("c", "q")
+        assert not leased.closed
+        assert "a" in registry.loaded
+    assert len(registry.loaded) == 2
+
+def test_concurrent_first_access_loads_once(registry):
+    barrier = threading.Barrier(8)
+    backends = []
+
+    def first_access():
+        barrier.wait()
+        with registry.lease("a") as backend:
+            backends.append(backend)
+
+    threads = [threading.Thread(target=first_access) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(b) for b in backends}) == 1
+    assert registry.loads == 1
+
+def test_unknown_collection(registry):
+    with pytest.raises(RuntimeError):
+        with registry.lease("missing"):
+            pass
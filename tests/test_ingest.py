@@ -0,0 +1,84 @@
+import os
+import pytest
+from langchain_core.documents import Document
+from src import ingest
+from src.ingest import ingest_directory
+
+class FakeVectorStore:
+    """Records the ids added to and deleted from the store."""
+
+    def __init__(self):
+        self.ids = {}
+        self.added = []
+        self.deleted = []
+
+    def get(self, limit=None, include=None):
+        return {"ids": list(self.ids)[:limit]}
+
+    def add_documents(self, documents, ids):
+        self.added.extend(ids)
+        self.ids.update(zip(ids, documents))
+
+    def delete(self, ids):
+        self.deleted.extend(ids)
+        for chunk_id in ids:
+            self.ids.pop(chunk_id, None)
+
+def fake_chunks(path, chunk_size, chunk_overlap, workers=None):
+    # Each line of the placeholder "PDF" is one chunk
+    with open(path, "r", encoding="utf-8") as f:
+        return [Document(page_content=line, metadata={"source": path}) for line in f.read().splitlines()]
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "load_and_chunk_pages", fake_chunks)
+    directory = tmp_path / "data"
+    directory.mkdir()
+    (directory / "a.pdf").write_text("alpha one\nalpha two\n", encoding="utf-8")
+    (directory / "b.pdf").write_text("beta one\n", encoding="utf-8")
+    return directory
+
+def run(data_dir, store, tmp_path):
+    store.added, store.deleted = [], []
+    return ingest_directory(str(data_dir), store, str(tmp_path / "manifest.json"))
+
+def test_first_run_adds_every_chunk(data_dir, tmp_path):
+    store = FakeVectorStore()
+    chunks, _, stats = run(data_dir, store, tmp_path)
+    assert [c.page_content for c in chunks] == ["alpha one", "alpha two", "beta one"]
+    assert stats["added"] == 3 and stats["deleted"] == 0
+    assert sorted(store.ids) == sorted(c.metadata["chunk_id"] for c in chunks)
+
+def test_unchanged_rerun_adds_nothing(data_dir, tmp_path):
+    store = FakeVectorStore()
+    _, key, _ = run(data_dir, store, tmp_path)
+    os.utime(data_dir / "a.pdf", (0, 0))  # touched but identical: the hash decides
+    _, same_key, stats = run(data_dir, store, tmp_path)
+    assert (stats["added"], stats["deleted"], stats["unchanged_documents"]) == (0, 0, 2)
+    assert same_key == key
+
+def test_changed_document_only_syncs_its_changed_chunks(data_dir, tmp_path):
+    store = FakeVectorStore()
+    first, key, _ = run(data_dir, store, tmp_path)
+    (data_dir / "a.pdf").write_text("alpha one\nalpha three\n", encoding="utf-8")
+    chunks, new_key, stats = run(data_dir, store, tmp_path)
+    assert (stats["added"], stats["deleted"]) == (1, 1)
+    assert store.deleted == [first[1].metadata["chunk_id"]]
+    assert [c.page_content for c in chunks] == ["alpha one", "alpha three", "beta one"]
+    assert chunks[0].metadata["chunk_id"] == first[0].metadata["chunk_id"]
+    assert new_key != key
+
+def test_removed_document_deletes_its_chunks(data_dir, tmp_path):
+    store = FakeVectorStore()
+    first, _, _ = run(data_dir, store, tmp_path)
+    os.remove(data_dir / "b.pdf")
+    chunks, _, stats = run(data_dir, store, tmp_path)
+    assert store.deleted == [first[2].metadata["chunk_id"]]
+    assert stats["documents"] == 1 and len(chunks) == 2
+
+def test_refuses_store_without_manifest(data_dir, tmp_path):
+    store = FakeVectorStore()
+    store.ids["foreign"] = Document(page_content="built elsewhere")
+    with pytest.raises(ValueError):
+        run(data_dir, store, tmp_path)
+    assert list(store.ids) == ["foreign"]
@@ -0,0 +1,46 @@
+import re
+import pytest
+from langchain_core.embeddings import Embeddings
+from src import metrics
+from src.embeddings import CachedEmbeddings
+
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_]\w*="(\\.|[^"\\])*",?)*\})? \S+$')
+
+class OneDimension(Embeddings):
+    def embed_documents(self, texts):
+        return [[1.0] for _ in texts]
+
+    def embed_query(self, text):
+        return [1.0]
+
+@pytest.fixture
+def registry():
+    metrics.configure(True)
+    yield
+    metrics.configure(False)
+
+def test_prometheus_output_is_valid_exposition_format(registry):
+    metrics.observe("psu_stage_seconds", 0.02, stage="retriever", component='say "hi"\\\nnow')
+    metrics.inc("psu_rerank_pairs_total", 3, cached="false")
+    metrics.register_gauge("psu_response_cache_hit_ratio", lambda: 0.5)
+    lines = metrics.render_prometheus().splitlines()
+    assert "# TYPE psu_stage_seconds histogram" in lines
+    assert "# TYPE psu_rerank_pairs_total counter" in lines
+    assert "# TYPE psu_response_cache_hit_ratio gauge" in lines
+    samples = [line for line in lines if not line.startswith("#")]
+    assert all(SAMPLE.match(line) for line in samples), samples
+    assert any('component="say \\"hi\\"\\\\\\nnow"' in line for line in samples)
+
+def test_each_family_is_typed_once(registry):
+    metrics.observe("psu_stage_seconds", 0.1, stage="llm", component="a")
+    metrics.observe("psu_stage_seconds", 0.1, stage="llm", component="b")
+    lines = metrics.render_prometheus().splitlines()
+    assert lines.count("# TYPE psu_stage_seconds histogram") == 1
+
+def test_embedding_misses_are_timed_as_their_own_stage(registry):
+    cached = CachedEmbeddings(OneDimension())
+    cached.embed_query("a")
+    cached.embed_query("a")
+    cached.embed_queries(["b", "c"])
+    output = metrics.render_prometheus()
+    assert 'psu_stage_seconds_count{component="OneDimension",stage="embedding"} 2' in output
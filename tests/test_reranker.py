@@ -0,0 +1,52 @@
+from typing import List
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from src.reranker import RerankingRetriever
+
+class FixedRetriever(BaseRetriever):
+    docs: List[Document]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.docs
+
+class TableReranker:
+    """Scores each text from a fixed table; records how many pairs it scored."""
+
+    def __init__(self, scores):
+        self.scores = scores
+        self.pairs = 0
+
+    def score(self, query, texts):
+        self.pairs += len(texts)
+        return [self.scores[text] for text in texts]
+
+def retriever(scores, **options):
+    docs = [Document(page_content=text) for text in scores]
+    reranker = TableReranker(scores)
+    return RerankingRetriever(base=FixedRetriever(docs=docs), reranker=reranker, batch_size=2, **options), reranker
+
+def contents(docs):
+    return [doc.page_content for doc in docs]
+
+def test_keeps_top_n_by_score_with_ties_in_base_order():
+    rerank, _ = retriever({"a": 0.1, "b": 0.9, "c": 0.5, "d": 0.9}, top_n=3)
+    assert contents(rerank.invoke("q")) == ["b", "d", "c"]
+
+def test_stops_after_a_batch_below_threshold():
+    rerank, model = retriever({"a": 0.9, "b": 0.2, "c": 0.1, "d": 0.3, "e": 0.95}, score_threshold=0.5)
+    assert contents(rerank.invoke("q")) == ["a"]
+    assert model.pairs == 4
+
+def test_first_batch_below_threshold_stops_and_keeps_the_best():
+    rerank, model = retriever({"a": 0.1, "b": 0.3, "c": 0.9}, score_threshold=0.5)
+    assert contents(rerank.invoke("q")) == ["b"]
+    assert model.pairs == 2
+
+def test_scores_are_cached_per_query():
+    rerank, model = retriever({"a": 0.1, "b": 0.3, "c": 0.9})
+    rerank.invoke("Query")
+    rerank.invoke("query ")
+    assert model.pairs == 3
@@ -0,0 +1,44 @@
+from typing import List
+import pytest
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from src.retriever import weighted_rrf
+
+class FixedRetriever(BaseRetriever):
+    docs: List[Document]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.docs
+
+def docs(*names):
+    return [Document(page_content=name) for name in names]
+
+CASES = [
+    (docs("a", "b", "c"), docs("c", "b", "d"), [0.5, 0.5]),
+    (docs("a", "b", "c", "d"), docs("d", "c", "b", "a"), [0.5, 0.5]),
+    (docs("a", "b"), docs("c", "d"), [0.7, 0.3]),
+    (docs("a", "b", "c"), docs(), [0.5, 0.5]),
+    (docs("a", "b", "a"), docs("b", "e", "f", "a"), [0.2, 0.8]),
+]
+
+@pytest.mark.parametrize("dense,sparse,weights", CASES)
+def test_weighted_rrf_matches_ensemble_retriever(dense, sparse, weights):
+    from langchain.retrievers import EnsembleRetriever
+
+    ensemble = EnsembleRetriever(retrievers=[FixedRetriever(docs=dense), FixedRetriever(docs=sparse)],
+                                 weights=weights)
+    expected = [doc.page_content for doc in ensemble.invoke("query")]
+    assert [doc.page_content for doc in weighted_rrf([dense, sparse], weights)] == expected
+
+def test_weighted_rrf_dedupes_by_id_key():
+    dense = [Document(page_content="first copy", metadata={"chunk_id": "1"}),
+             Document(page_content="other", metadata={"chunk_id": "2"})]
+    sparse = [Document(page_content="second copy", metadata={"chunk_id": "1"})]
+    fused = weighted_rrf([dense, sparse], [0.5, 0.5], id_key="chunk_id")
+    assert [doc.page_content for doc in fused] == ["first copy", "other"]
+
+def test_weighted_rrf_empty():
+    assert weighted_rrf([[], []], [0.5, 0.5]) == []